@@ -0,0 +1,35 @@
+"""
+Microbenchmark for webhook signature checking.
+
+Run with `python benchmarks/signature.py`.
+"""
+import timeit
+
+import nexmo
+
+client = nexmo.Client(key='key', secret='secret', signature_secret='signature-secret', signature_method='sha256')
+
+params = {
+    'msisdn': '447700900001',
+    'to': '447700900000',
+    'network-code': '23410',
+    'messageId': '0A0000001234567B',
+    'price': '0.03330000',
+    'status': 'delivered',
+    'scts': '2001011400',
+    'err-code': '0',
+    'message-timestamp': '2020-01-01 14:00:00',
+    'timestamp': '1578750000',
+}
+params['sig'] = client.signature(dict(params))
+
+batch = [params] * 1000
+
+if __name__ == '__main__':
+    number = 20
+
+    single = min(timeit.repeat(lambda: client.check_signature(params), number=number * 1000, repeat=3))
+    print('check_signature:  {0:.2f} us per payload'.format(single / (number * 1000) * 1e6))
+
+    batched = min(timeit.repeat(lambda: client.check_signatures(batch), number=number, repeat=3))
+    print('check_signatures: {0:.2f} us per payload'.format(batched / (number * len(batch)) * 1e6))
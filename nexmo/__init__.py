@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
 from platform import python_version
@@ -13,6 +14,11 @@ import time
 from uuid import uuid4
 import warnings
 
+from nexmo.batching import MAX_MESSAGE_IDS, MAX_VERIFICATION_IDS
+from nexmo.httpcache import cache_key
+from nexmo.pagination import iterate_pages, paginate
+from nexmo.streaming import iter_items
+
 if sys.version_info[0] == 3:
     string_types = (str, bytes)
     from urllib.parse import urlparse
@@ -22,11 +28,19 @@ else:
 
 __version__ = '2.1.0'
 
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+# The value recorded against a client-ref while its send is in flight, or when its outcome is unknown.
+_IN_FLIGHT = 'in-flight'
+
 logger = logging.getLogger('nexmo')
 
 
 class Error(Exception):
-    pass
+    def __init__(self, *args, **kwargs):
+        # The HTTP status code of the response the error was raised for, if any.
+        self.status_code = kwargs.pop('status_code', None)
+        super(Error, self).__init__(*args, **kwargs)
 
 
 class ClientError(Error):
@@ -41,6 +55,14 @@ class AuthenticationError(ClientError):
     pass
 
 
+class SuppressedError(ClientError):
+    pass
+
+
+class IdempotencyError(ClientError):
+    pass
+
+
 class Client():
     def __init__(self, **kwargs):
         self.api_key = kwargs.get('key', None) or os.environ.get('NEXMO_API_KEY', None)
@@ -59,6 +81,9 @@ class Client():
         elif self.signature_method == 'sha512':
             self.signature_method = hashlib.sha512
 
+        self._signature_hmac_key = None
+        self._signature_hmac_template = None
+
         self.application_id = kwargs.get('application_id', None)
 
         self.private_key = kwargs.get('private_key', None)
@@ -80,20 +105,93 @@ class Client():
 
         self.auth_params = {}
 
+        self.idempotency_store = kwargs.get('idempotency_store', None)
+
+        self.suppression_list = kwargs.get('suppression_list', None)
+
+        self.balance_tracker = kwargs.get('balance_tracker', None)
+
+        self.insight_cache = kwargs.get('insight_cache', None)
+
+        self.http_cache = kwargs.get('http_cache', None)
+
+        if self.balance_tracker is not None and self.balance_tracker.client is None:
+            self.balance_tracker.client = self
+
     def auth(self, params=None, **kwargs):
         self.auth_params = params or kwargs
 
     def send_message(self, params):
-        return self.post(self.host, '/sms/json', params)
+        """
+        Send an SMS message.
+
+        If the client was constructed with an `idempotency_store`, the `client-ref` param is used as an idempotency
+        key. The key is reserved in the store before the message is sent and the response is recorded against it
+        if any part of the message was sent, so sending again with the same `client-ref` returns the recorded
+        response instead of sending a duplicate. While a send is in flight, or when its outcome is unknown because
+        no response was received, sending again raises `IdempotencyError`; delete the key from the store once the
+        outcome is known to allow it to be sent again. The key is released if no part of the message was sent.
+
+        :param params: A `dict` of params for the SMS API.
+        :return: The parsed response from the server.
+        """
+        return self._send_sms(params, lambda: self.post(self.host, '/sms/json', params))
+
+    def _send_sms(self, params, send):
+        """
+        Send an SMS message with `send`, guarding it with the `client-ref` idempotency key and updating the balance
+        tracker, as described for `send_message`.
+        """
+        key = params.get('client-ref') if self.idempotency_store is not None else None
+
+        if key is not None:
+            response = self._reserve(key)
+            if response is not None:
+                logger.debug("Returning recorded response for client-ref %r", key)
+                return response
+
+        try:
+            response = send()
+        except (ClientError, ServerError):
+            # A response was received, so the message wasn't sent.
+            if key is not None:
+                self.idempotency_store.delete(key)
+            raise
+
+        if self.balance_tracker is not None:
+            self.balance_tracker.update(response)
+
+        if key is not None:
+            if _is_partly_sent(response):
+                # Resending would duplicate the parts that were sent, so even a partial failure is recorded.
+                self.idempotency_store.set(key, response)
+            else:
+                self.idempotency_store.delete(key)
+
+        return response
+
+    def _reserve(self, key):
+        """
+        Reserve an idempotency key, returning `None` if it was reserved or the response recorded against it if it
+        has already been sent.
+        """
+        while not self.idempotency_store.add(key, _IN_FLIGHT):
+            response = self.idempotency_store.get(key)
+            if response == _IN_FLIGHT:
+                raise IdempotencyError("A message with client-ref {0!r} is in flight, or its outcome is unknown"
+                                       .format(key))
+            if response is not None:
+                return response
+        return None
 
     def get_balance(self):
         return self.get(self.host, '/account/get-balance')
 
-    def get_country_pricing(self, country_code):
-        return self.get(self.host, '/account/get-pricing/outbound', {'country': country_code})
+    def get_country_pricing(self, country_code, type=None):
+        return self.get(self.host, _pricing_uri('/account/get-pricing/outbound', type), {'country': country_code})
 
-    def get_prefix_pricing(self, prefix):
-        return self.get(self.host, '/account/get-prefix-pricing/outbound', {'prefix': prefix})
+    def get_prefix_pricing(self, prefix, type=None):
+        return self.get(self.host, _pricing_uri('/account/get-prefix-pricing/outbound', type), {'prefix': prefix})
 
     def get_sms_pricing(self, number):
         return self.get(self.host, '/account/get-phone-pricing/outbound/sms', {'phone': number})
@@ -110,9 +208,30 @@ class Client():
     def get_account_numbers(self, params=None, **kwargs):
         return self.get(self.host, '/account/numbers', params or kwargs)
 
+    def iter_account_numbers(self, params=None, prefetch=1, stream=False, **kwargs):
+        if stream:
+            def fetch(page):
+                return self.get(self.host, '/account/numbers', page, stream=['numbers'])
+        else:
+            fetch = self.get_account_numbers
+
+        return paginate(fetch, params or kwargs, ['numbers'], 'index', 'size', first_index=1, prefetch=prefetch,
+                        stream=stream)
+
     def get_available_numbers(self, country_code, params=None, **kwargs):
         return self.get(self.host, '/number/search', dict(params or kwargs, country=country_code))
 
+    def iter_available_numbers(self, country_code, params=None, prefetch=1, stream=False, **kwargs):
+        if stream:
+            def fetch(page):
+                return self.get(self.host, '/number/search', dict(page, country=country_code), stream=['numbers'])
+        else:
+            def fetch(page):
+                return self.get_available_numbers(country_code, page)
+
+        return paginate(fetch, params or kwargs, ['numbers'], 'index', 'size', first_index=1, prefetch=prefetch,
+                        stream=stream)
+
     def buy_number(self, params=None, **kwargs):
         return self.post(self.host, '/number/buy', params or kwargs)
 
@@ -131,6 +250,21 @@ class Client():
     def search_messages(self, params=None, **kwargs):
         return self.get(self.host, '/search/messages', params or kwargs)
 
+    def iter_messages(self, ids, prefetch=1):
+        """
+        Yield the messages with the given ids, searching for up to `MAX_MESSAGE_IDS` ids per request.
+        """
+        ids = list(ids)
+        chunks = [ids[start:start + MAX_MESSAGE_IDS] for start in range(0, len(ids), MAX_MESSAGE_IDS)]
+
+        def fetch_page(number):
+            if not chunks:
+                return [], False
+            items = self.search_messages(ids=chunks[number]).get('items') or []
+            return items, number + 1 < len(chunks)
+
+        return iterate_pages(fetch_page, prefetch)
+
     def send_ussd_push_message(self, params=None, **kwargs):
         return self.post(self.host, '/ussd/json', params or kwargs)
 
@@ -159,10 +293,14 @@ class Client():
         return self.post(self.api_host, '/conversions/sms', params)
 
     def send_event_alert_message(self, params=None, **kwargs):
-        return self.post(self.host, '/sc/us/alert/json', params or kwargs)
+        params = params or kwargs
+        self._check_suppressed(params)
+        return self.post(self.host, '/sc/us/alert/json', params)
 
     def send_marketing_message(self, params=None, **kwargs):
-        return self.post(self.host, '/sc/us/marketing/json', params or kwargs)
+        params = params or kwargs
+        self._check_suppressed(params)
+        return self.post(self.host, '/sc/us/marketing/json', params)
 
     def get_event_alert_numbers(self):
         return self.get(self.host, '/sc/us/alert/opt-in/query/json')
@@ -200,6 +338,27 @@ class Client():
     def get_verification(self, request_id):
         return self.get(self.api_host, '/verify/search/json', {'request_id': request_id})
 
+    def get_verifications(self, request_ids, workers=4):
+        """
+        Look up many verifications, searching for up to `MAX_VERIFICATION_IDS` request ids per request, with up to
+        `workers` requests made concurrently.
+
+        :return: A `dict` of the verifications by request id. Ids that weren't found are left out.
+        """
+        request_ids = list(request_ids)
+        chunks = [request_ids[start:start + MAX_VERIFICATION_IDS]
+                  for start in range(0, len(request_ids), MAX_VERIFICATION_IDS)]
+
+        def search(chunk):
+            response = self.get(self.api_host, '/verify/search/json', {'request_ids': chunk})
+            if 'verification_requests' in response:
+                return response['verification_requests']
+            return [response] if response.get('request_id') else []
+
+        with ThreadPoolExecutor(workers) as executor:
+            return dict((verification['request_id'], verification)
+                        for verifications in executor.map(search, chunks) for verification in verifications)
+
     def get_verification_request(self, request_id):
         warnings.warn('nexmo.Client#get_verification_request is deprecated (use #get_verification instead)',
                       DeprecationWarning, stacklevel=2)
@@ -218,10 +377,10 @@ class Client():
         return self.post(self.api_host, '/verify/control/json', params or kwargs)
 
     def get_basic_number_insight(self, params=None, **kwargs):
-        return self.get(self.api_host, '/ni/basic/json', params or kwargs)
+        return self._number_insight('basic', params or kwargs)
 
     def get_standard_number_insight(self, params=None, **kwargs):
-        return self.get(self.api_host, '/ni/standard/json', params or kwargs)
+        return self._number_insight('standard', params or kwargs)
 
     def get_number_insight(self, params=None, **kwargs):
         warnings.warn('nexmo.Client#get_number_insight is deprecated (use #get_standard_number_insight instead)',
@@ -230,7 +389,20 @@ class Client():
         return self.get(self.api_host, '/number/lookup/json', params or kwargs)
 
     def get_advanced_number_insight(self, params=None, **kwargs):
-        return self.get(self.api_host, '/ni/advanced/json', params or kwargs)
+        return self._number_insight('advanced', params or kwargs)
+
+    def _number_insight(self, level, params):
+        if self.insight_cache is not None:
+            response = self.insight_cache.get(level, params)
+            if response is not None:
+                return response
+
+        response = self.get(self.api_host, '/ni/' + level + '/json', params)
+
+        if self.insight_cache is not None and isinstance(response, dict) and response.get('status') == 0:
+            self.insight_cache.set(level, params, response)
+
+        return response
 
     def request_number_insight(self, params=None, **kwargs):
         return self.post(self.host, '/ni/json', params or kwargs)
@@ -238,6 +410,17 @@ class Client():
     def get_applications(self, params=None, **kwargs):
         return self.get(self.api_host, '/v1/applications', params or kwargs)
 
+    def iter_applications(self, params=None, prefetch=1, stream=False, **kwargs):
+        path = ['_embedded', 'applications']
+
+        if stream:
+            def fetch(page):
+                return self.get(self.api_host, '/v1/applications', page, stream=path)
+        else:
+            fetch = self.get_applications
+
+        return paginate(fetch, params or kwargs, path, 'page_index', 'page_size', prefetch=prefetch, stream=stream)
+
     def get_application(self, application_id):
         return self.get(self.api_host, '/v1/applications/' + application_id)
 
@@ -256,6 +439,18 @@ class Client():
     def get_calls(self, params=None, **kwargs):
         return self._jwt_signed_get('/v1/calls', params or kwargs)
 
+    def iter_calls(self, params=None, prefetch=1, stream=False, **kwargs):
+        path = ['_embedded', 'calls']
+
+        if stream:
+            def fetch(page):
+                return self._jwt_signed_get('/v1/calls', page, stream=path)
+        else:
+            fetch = self.get_calls
+
+        return paginate(fetch, params or kwargs, path, 'record_index', 'page_size', offset=True, prefetch=prefetch,
+                        stream=stream)
+
     def get_call(self, uuid):
         return self._jwt_signed_get('/v1/calls/' + uuid)
 
@@ -282,66 +477,100 @@ class Client():
         return self.parse(hostname, requests.get(url, headers=self._headers()))
 
     def check_signature(self, params):
-        params = dict(params)
+        signature = params.get('sig', '').lower()
+
+        return hmac.compare_digest(signature, self._signature(params, exclude='sig'))
 
-        signature = params.pop('sig', '').lower()
+    def check_signatures(self, batch):
+        """
+        Check the signatures of many webhook payloads.
 
-        return hmac.compare_digest(signature, self.signature(params))
+        :param batch: An iterable of `dict` payloads, each including its `sig` param.
+        :return: A `list` of `bool`, one for each payload.
+        """
+        check = self.check_signature
+        return [check(params) for params in batch]
 
     def signature(self, params):
+        # Add timestamp if not already present
+        if not params.get("timestamp"):
+            params["timestamp"] = int(time.time())
+
+        return self._signature(params)
+
+    def _signature(self, params, exclude=None):
         if self.signature_method:
-            hasher = hmac.new(self.signature_secret.encode(), digestmod=self.signature_method)
+            hasher = self._signature_hmac()
         else:
             hasher = hashlib.md5()
 
-        # Add timestamp if not already present
-        if not params.get("timestamp"):
-            params["timestamp"] = int(time.time())
+        timestamp = params.get('timestamp') or int(time.time())
+        keys = sorted(params) if 'timestamp' in params else sorted(list(params) + ['timestamp'])
+
+        parts = []
+        for key in keys:
+            if key == exclude:
+                continue
 
-        for key in sorted(params):
-            value = params[key]
+            value = timestamp if key == 'timestamp' else params[key]
 
             if isinstance(value, str):
                 value = value.replace('&', '_').replace('=', '_')
 
-            hasher.update('&{0}={1}'.format(key, value).encode('utf-8'))
+            parts.append('&{0}={1}'.format(key, value))
+
+        hasher.update(''.join(parts).encode('utf-8'))
 
         if self.signature_method is None:
             hasher.update(self.signature_secret.encode())
 
         return hasher.hexdigest()
 
-    def get(self, host, request_uri, params=None):
+    def _signature_hmac(self):
+        # Keying an HMAC is the expensive part of creating one, so a keyed template is kept and copied for each use.
+        key = (self.signature_secret, self.signature_method)
+
+        if self._signature_hmac_key != key:
+            self._signature_hmac_template = hmac.new(self.signature_secret.encode(), digestmod=self.signature_method)
+            self._signature_hmac_key = key
+
+        return self._signature_hmac_template.copy()
+
+    def get(self, host, request_uri, params=None, stream=None):
         uri = 'https://' + host + request_uri
 
         params = dict(params or {}, api_key=self.api_key, api_secret=self.api_secret)
         logger.debug("GET to %r with params %r", uri, params)
-        return self.parse(host, requests.get(uri, params=params, headers=self.headers))
+
+        if stream is not None:
+            return self.parse_stream(host, requests.get(uri, params=params, headers=self.headers, stream=True), stream)
+
+        return self._get(host, uri, params, self.headers.copy, params)
 
     def post(self, host, request_uri, params):
         uri = 'https://' + host + request_uri
 
         params = dict(params, api_key=self.api_key, api_secret=self.api_secret)
         logger.debug("POST to %r with params %r", uri, params)
-        return self.parse(host, requests.post(uri, data=params, headers=self.headers))
+        return self._invalidate(uri, self.parse(host, requests.post(uri, data=params, headers=self.headers)))
 
     def put(self, host, request_uri, params):
         uri = 'https://' + host + request_uri
 
         params = dict(params, api_key=self.api_key, api_secret=self.api_secret)
         logger.debug("PUT to %r with params %r", uri, params)
-        return self.parse(host, requests.put(uri, json=params, headers=self.headers))
+        return self._invalidate(uri, self.parse(host, requests.put(uri, json=params, headers=self.headers)))
 
     def delete(self, host, request_uri):
         uri = 'https://' + host + request_uri
 
         params = dict(api_key=self.api_key, api_secret=self.api_secret)
         logger.debug("DELETE to %r with params %r", uri, params)
-        return self.parse(host, requests.delete(uri, params=params, headers=self.headers))
+        return self._invalidate(uri, self.parse(host, requests.delete(uri, params=params, headers=self.headers)))
 
     def parse(self, host, response):
         if response.status_code == 401:
-            raise AuthenticationError
+            raise AuthenticationError(status_code=response.status_code)
         elif response.status_code == 204:
             return None
         elif 200 <= response.status_code < 300:
@@ -352,31 +581,85 @@ class Client():
         elif 400 <= response.status_code < 500:
             logger.warn("Client error: %s %r", response.status_code, response.content)
             message = "{code} response from {host}".format(code=response.status_code, host=host)
-            raise ClientError(message)
+            raise ClientError(message, status_code=response.status_code)
         elif 500 <= response.status_code < 600:
             logger.warn("Server error: %s %r", response.status_code, response.content)
             message = "{code} response from {host}".format(code=response.status_code, host=host)
-            raise ServerError(message)
+            raise ServerError(message, status_code=response.status_code)
+
+    def _check_suppressed(self, params):
+        if self.suppression_list is not None and params.get('to') in self.suppression_list:
+            raise SuppressedError("{to} has opted out of messages".format(to=params['to']))
+
+    def parse_stream(self, host, response, path):
+        """
+        Parse a response as `parse` does, except that the records in the JSON array at `path` are returned as a
+        generator, parsed from the body incrementally as they are consumed. Errors are raised straight away.
+
+        :param path: The sequence of object keys leading to the array, such as `['_embedded', 'calls']`.
+        """
+        if (200 <= response.status_code < 300 and response.status_code != 204 and
+                response.headers.get('content-type', '').startswith('application/json')):
+            return _close_after(iter_items(response.iter_content(_STREAM_CHUNK_SIZE), path), response)
+
+        try:
+            self.parse(host, response)
+        finally:
+            response.close()
+        return iter([])
 
-    def _jwt_signed_get(self, request_uri, params=None):
+    def _jwt_signed_get(self, request_uri, params=None, stream=None):
         uri = 'https://' + self.api_host + request_uri
 
-        return self.parse(self.api_host, requests.get(uri, params=params or {}, headers=self._headers()))
+        if stream is not None:
+            response = requests.get(uri, params=params or {}, headers=self._headers(), stream=True)
+            return self.parse_stream(self.api_host, response, stream)
+
+        return self._get(self.api_host, uri, params or {}, self._headers,
+                         dict(params or {}, application_id=self.application_id))
+
+    def _get(self, host, uri, params, headers, cache_params):
+        """
+        Send a GET request, through the HTTP cache if there is one. `headers` is a callable returning the request
+        headers, so that JWTs are only generated for requests that are actually sent.
+        """
+        if self.http_cache is None:
+            return self.parse(host, requests.get(uri, params=params, headers=headers()))
+
+        def send(extra_headers):
+            return requests.get(uri, params=params, headers=dict(headers(), **extra_headers))
+
+        def parse(response):
+            return self.parse(host, response)
+
+        return self.http_cache.fetch(cache_key(uri, cache_params), send, parse)
+
+    def _invalidate(self, uri, response):
+        """
+        Drop the cached responses for a resource that a request has changed, and for its parent collection, and
+        return the request's response.
+        """
+        if self.http_cache is not None:
+            self.http_cache.invalidate(uri)
+            self.http_cache.invalidate(uri.rsplit('/', 1)[0])
+        return response
 
     def _jwt_signed_post(self, request_uri, params):
         uri = 'https://' + self.api_host + request_uri
 
-        return self.parse(self.api_host, requests.post(uri, json=params, headers=self._headers()))
+        response = requests.post(uri, json=params, headers=self._headers())
+        return self._invalidate(uri, self.parse(self.api_host, response))
 
     def _jwt_signed_put(self, request_uri, params):
         uri = 'https://' + self.api_host + request_uri
 
-        return self.parse(self.api_host, requests.put(uri, json=params, headers=self._headers()))
+        response = requests.put(uri, json=params, headers=self._headers())
+        return self._invalidate(uri, self.parse(self.api_host, response))
 
     def _jwt_signed_delete(self, request_uri):
         uri = 'https://' + self.api_host + request_uri
 
-        return self.parse(self.api_host, requests.delete(uri, headers=self._headers()))
+        return self._invalidate(uri, self.parse(self.api_host, requests.delete(uri, headers=self._headers())))
 
     def _headers(self):
         iat = int(time.time())
@@ -392,6 +675,23 @@ class Client():
         return dict(self.headers, Authorization=b'Bearer ' + token)
 
 
+def _pricing_uri(uri, type):
+    return uri if type is None else uri + '/' + type
+
+
+def _is_partly_sent(response):
+    messages = response.get('messages') if isinstance(response, dict) else None
+    return any(message.get('status') == '0' for message in messages or [])
+
+
+def _close_after(items, response):
+    try:
+        for item in items:
+            yield item
+    finally:
+        response.close()
+
+
 def _format_date_param(params, key, format='%Y-%m-%d %H:%M:%S'):
     """
     Utility function to convert datetime values to strings.
@@ -0,0 +1,248 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from nexmo import e164
+
+Price = namedtuple('Price', ['price', 'currency', 'country', 'network'])
+
+
+class BalanceTracker(object):
+    """
+    Track the account balance locally from the `remaining-balance` of each SMS sent.
+
+    Pass the tracker to `nexmo.Client` as `balance_tracker` and it is updated from every `send_message` response.
+    The balance is only fetched with `get_balance` when it is read and hasn't been reconciled for
+    `reconcile_interval` seconds, so pre-send checks normally need no network round trip::
+
+        tracker = BalanceTracker(reconcile_interval=3600)
+        tracker.add_threshold(10, lambda balance: alert('Balance is down to {0}'.format(balance)))
+
+        client = nexmo.Client(key=api_key, secret=api_secret, balance_tracker=tracker)
+
+    :param client: The `nexmo.Client` used to reconcile the balance. Defaults to the client the tracker is passed to.
+    :param reconcile_interval: The number of seconds after which the balance is re-fetched with `get_balance`.
+    """
+
+    def __init__(self, client=None, reconcile_interval=3600):
+        self.client = client
+        self.reconcile_interval = reconcile_interval
+        self.reconciled_at = None
+
+        self._balance = None
+        self._thresholds = []
+        self._lock = threading.Lock()
+
+    @property
+    def balance(self):
+        """The current balance, reconciled with `get_balance` first if it is stale."""
+        reconciled_at = self.reconciled_at
+        if self.client is not None and (reconciled_at is None or
+                                        time.time() - reconciled_at >= self.reconcile_interval):
+            self.reconcile()
+        return self._balance
+
+    def reconcile(self):
+        """Fetch the balance with `get_balance`."""
+        response = self.client.get_balance()
+        self._set(float(response['value']))
+        self.reconciled_at = time.time()
+
+    def update(self, response):
+        """Update the balance from a `send_message` response."""
+        balances = [message['remaining-balance'] for message in response.get('messages') or []
+                    if 'remaining-balance' in message]
+        if balances:
+            self._set(min(float(balance) for balance in balances))
+
+    def add_threshold(self, amount, callback):
+        """
+        Call `callback(balance)` whenever the balance drops below `amount`.
+
+        The callback is called once per crossing; it fires again only after the balance has risen back to `amount`
+        or above.
+        """
+        with self._lock:
+            self._thresholds.append([amount, callback, False])
+
+    def _set(self, balance):
+        fired = []
+
+        with self._lock:
+            self._balance = balance
+            for threshold in self._thresholds:
+                amount, callback, below = threshold
+                threshold[2] = balance < amount
+                if threshold[2] and not below:
+                    fired.append(callback)
+
+        for callback in fired:
+            callback(balance)
+
+
+class PricingIndex(object):
+    """
+    Estimate outbound SMS or voice prices locally, from pricing synced for a set of countries and dialing prefixes.
+
+    Each country's default price is indexed under its dialing prefix, and each network's price under the number
+    ranges the network serves. A number is priced by the longest indexed prefix that it starts with, so lookups
+    need no network round trip. Where countries share a dialing prefix (such as '1'), the one synced last prices
+    numbers that no network range covers. The pricing is re-synced when it is read and `refresh_interval` seconds
+    have passed since the last sync, by one reader while the others wait. Pricing added with `load` is kept across
+    syncs, though synced pricing takes precedence for the same prefix. An index with no countries or prefixes is
+    never synced automatically::
+
+        index = PricingIndex(client, countries=['GB', 'FR', 'DE'])
+        total, unpriced = index.cost(recipients, units=2)
+
+    :param client: The `nexmo.Client` to fetch pricing with.
+    :param countries: The country codes to sync with `get_country_pricing`.
+    :param prefixes: The dialing prefixes to sync with `get_prefix_pricing`, covering every country using them.
+    :param type: The type of pricing: `None` for the SMS pricing of the unqualified endpoints, or `'sms'` or
+        `'voice'`.
+    :param refresh_interval: The number of seconds after which the pricing is re-synced, or `None` to only sync
+        when `sync` is called.
+    :param workers: The number of pricing requests made concurrently.
+    """
+
+    def __init__(self, client, countries=(), prefixes=(), type=None, refresh_interval=86400, workers=4):
+        self.client = client
+        self.countries = list(countries)
+        self.prefixes = list(prefixes)
+        self.type = type
+        self.refresh_interval = refresh_interval
+        self.workers = workers
+        self.synced_at = None
+
+        self._prices = {}
+        self._longest = 0
+        self._synced = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def sync(self):
+        """Fetch the pricing for every country and prefix, replacing the synced pricing in the index."""
+        with self._sync_lock:
+            self._sync()
+
+    def load(self, pricing):
+        """
+        Add pricing already fetched to the index.
+
+        :param pricing: An iterable of country pricing, as returned by `get_country_pricing`.
+        """
+        entries = {}
+        for country in pricing:
+            entries.update(_index_entries(country))
+
+        with self._lock:
+            self._loaded.update(entries)
+            self._rebuild()
+
+    def estimate(self, number):
+        """Return the `Price` for sending to `number`, or `None` if no indexed prefix matches it."""
+        prices, longest = self._current()
+        return _lookup(prices, longest, number)
+
+    def estimate_many(self, numbers):
+        """Return a `list` of the `Price` (or `None`) for each of `numbers`, in order."""
+        prices, longest = self._current()
+        return [_lookup(prices, longest, number) for number in numbers]
+
+    def cost(self, numbers, units=1):
+        """
+        Estimate the total cost of sending to each of `numbers`.
+
+        :param units: The number of units charged per number: SMS segments, or call minutes.
+        :return: A tuple of the total cost and a `list` of the numbers that couldn't be priced.
+        """
+        prices, longest = self._current()
+        total = 0.0
+        unpriced = []
+
+        for number in numbers:
+            price = _lookup(prices, longest, number)
+            if price is None:
+                unpriced.append(number)
+            else:
+                total += price.price * units
+
+        return total, unpriced
+
+    def __len__(self):
+        return len(self._prices)
+
+    def _current(self):
+        if self._stale():
+            with self._sync_lock:
+                # Another reader may have synced while this one waited.
+                if self._stale():
+                    self._sync()
+
+        with self._lock:
+            return self._prices, self._longest
+
+    def _sync(self):
+        with ThreadPoolExecutor(self.workers) as executor:
+            countries = executor.map(lambda country: self.client.get_country_pricing(country, self.type),
+                                     self.countries)
+            prefixes = executor.map(lambda prefix: self.client.get_prefix_pricing(prefix, self.type), self.prefixes)
+            pricing = list(countries) + [country for response in prefixes for country in response.get('prices') or []]
+
+        synced = {}
+        for country in pricing:
+            synced.update(_index_entries(country))
+
+        with self._lock:
+            self._synced = synced
+            self.synced_at = time.time()
+            self._rebuild()
+
+    def _stale(self):
+        if self.refresh_interval is None or not (self.countries or self.prefixes):
+            return False
+        synced_at = self.synced_at
+        return synced_at is None or time.time() - synced_at >= self.refresh_interval
+
+    def _rebuild(self):
+        prices = dict(self._loaded)
+        prices.update(self._synced)
+        self._prices = prices
+        self._longest = max([len(prefix) for prefix in prices] or [0])
+
+
+def _index_entries(country):
+    """
+    Yield `(prefix, Price)` pairs for the country's default price and each network's number ranges. Both the older
+    (`prefix`, `mt`, `mtPrice`) and newer (`dialingPrefix`, `defaultPrice`, `price`) response formats are handled.
+    """
+    code = country.get('country') or country.get('countryCode')
+    currency = country.get('currency')
+    prefix = country.get('prefix') or country.get('dialingPrefix')
+    default = country.get('mt') or country.get('defaultPrice')
+
+    if prefix and default is not None:
+        yield str(prefix), Price(float(default), currency, code, None)
+
+    for network in country.get('networks') or []:
+        price = network.get('mtPrice') or network.get('price')
+        if price is None:
+            continue
+        price = Price(float(price), network.get('currency', currency), code,
+                      network.get('network') or network.get('networkName'))
+        for number_range in network.get('ranges') or []:
+            yield str(number_range), price
+
+
+def _lookup(prices, longest, number):
+    digits = e164.normalize(str(number))
+    if digits is None:
+        return None
+
+    for length in range(min(longest, len(digits)), 0, -1):
+        price = prices.get(digits[:length])
+        if price is not None:
+            return price
+    return None
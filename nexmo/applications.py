@@ -0,0 +1,106 @@
+"""
+Keep the account's applications in line with a declared spec.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+UNCHANGED = 'unchanged'
+
+ApplicationResult = namedtuple('ApplicationResult', ['name', 'action', 'id', 'changes', 'error'])
+
+
+def sync_applications(client, spec, delete_unlisted=False, dry_run=False, workers=8):
+    """
+    Create, update and delete applications so that they match `spec`, making only the calls needed.
+
+    Every application is loaded in one pass with `iter_applications` and matched to the spec by name. Applications
+    whose settings differ from the spec are updated, missing ones are created, and the calls for different
+    applications are made concurrently::
+
+        results = sync_applications(client, {
+            'Support line': {'type': 'voice', 'answer_url': 'https://example.com/answer',
+                             'event_url': 'https://example.com/event'},
+        }, dry_run=True)
+
+    :param client: The `nexmo.Client` to manage applications with.
+    :param spec: A `dict` of the params for `create_application` of each application by name, such as `type`,
+        `answer_url`, `answer_method`, `event_url` and `event_method`, or `None` for the application to be deleted.
+    :param delete_unlisted: `True` to also delete every application missing from `spec`.
+    :param dry_run: `True` to work out the changes without making them.
+    :param workers: The number of applications changed concurrently.
+    :return: A `list` of an `ApplicationResult` for each application, sorted by name. `changes` is a `dict` of
+        `(current, desired)` values by param, and `error` is the exception raised while changing it, if any. When
+        several applications share a name, only the first listed is synced.
+    """
+    current = {}
+    for application in client.iter_applications():
+        current.setdefault(application['name'], application)
+
+    spec = dict(spec)
+    if delete_unlisted:
+        for name in set(current) - set(spec):
+            spec[name] = None
+
+    plans = [_plan_application(name, current.get(name), params) for name, params in sorted(spec.items())]
+
+    if dry_run:
+        return [ApplicationResult(*plan[:4] + (None,)) for plan in plans]
+
+    def apply(plan):
+        name, action, application_id, changes, params = plan
+        try:
+            if action == CREATE:
+                application_id = client.create_application(params).get('id')
+            elif action == UPDATE:
+                client.update_application(application_id, params)
+            elif action == DELETE:
+                client.delete_application(application_id)
+        except Exception as e:
+            return ApplicationResult(name, action, application_id, changes, e)
+        return ApplicationResult(name, action, application_id, changes, None)
+
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(apply, plans))
+
+
+def application_params(application):
+    """
+    Flatten an application, as returned by `get_application`, into params for `create_application` or
+    `update_application`.
+    """
+    params = {'name': application.get('name')}
+
+    for capability in ('voice', 'messages', 'rtc'):
+        settings = application.get(capability)
+        if not settings:
+            continue
+        params.setdefault('type', capability)
+        for webhook in settings.get('webhooks') or []:
+            endpoint_type = webhook.get('endpoint_type')
+            params.setdefault(endpoint_type, webhook.get('endpoint'))
+            if webhook.get('http_method'):
+                params.setdefault(endpoint_type.replace('_url', '_method'), webhook['http_method'])
+
+    return params
+
+
+def _plan_application(name, application, params):
+    if params is None:
+        if application is None:
+            return name, UNCHANGED, None, {}, None
+        return name, DELETE, application['id'], {}, None
+
+    params = dict(params, name=name)
+
+    if application is None:
+        return name, CREATE, None, dict((key, (None, value)) for key, value in params.items()), params
+
+    existing = application_params(application)
+    changes = dict((key, (existing.get(key), value)) for key, value in params.items()
+                   if str(existing.get(key)) != str(value))
+
+    # Unchanged params are sent too, as the update replaces the application's settings.
+    return name, UPDATE if changes else UNCHANGED, application['id'], changes, dict(existing, **params)
@@ -0,0 +1,48 @@
+"""
+An ASGI application for receiving Nexmo webhooks. Requires Python 3.5+; see `nexmo.webhooks` for details.
+"""
+from nexmo.webhooks import UNSIGNED_EVENT_TYPES, WebhookHandler
+
+
+def asgi_app(client=None, callback=None, queue=None, max_body_size=1024 * 1024, unsigned_types=UNSIGNED_EVENT_TYPES):
+    """
+    Build an ASGI application that receives webhooks. The arguments are the same as for
+    `nexmo.webhooks.WebhookHandler`; request bodies larger than `max_body_size` bytes are rejected.
+    """
+    handler = WebhookHandler(client, callback, queue, unsigned_types)
+
+    async def application(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+
+        if scope['type'] != 'http':
+            raise ValueError('Unsupported scope type: {0}'.format(scope['type']))
+
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if len(body) > max_body_size:
+                await _respond(send, 400)
+                return
+
+        headers = dict(scope.get('headers') or [])
+        content_type = headers.get(b'content-type', b'').decode('latin-1')
+        query_string = scope.get('query_string', b'').decode('latin-1')
+
+        await _respond(send, handler.handle(scope['method'], query_string, content_type, body))
+
+    return application
+
+
+async def _respond(send, status):
+    await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'text/plain')]})
+    await send({'type': 'http.response.body', 'body': b''})
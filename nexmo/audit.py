@@ -0,0 +1,140 @@
+"""
+Re-verify the signatures of archived webhook payloads.
+
+Archives are read in chunks and checked across a pool of worker processes, with a bounded number of chunks in flight,
+so memory use is constant however large the archive is. It can also be run as a script::
+
+    python -m nexmo.audit inbound.jsonl results.csv --method sha256 --processes 8
+"""
+from collections import deque
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+
+from nexmo import Client
+
+_client = None
+
+
+def _init_worker(signature_secret, signature_method):
+    global _client
+    _client = Client(signature_secret=signature_secret, signature_method=signature_method)
+
+
+def _check_chunk(chunk):
+    return _client.check_signatures(chunk)
+
+
+def read_archive(path):
+    """
+    Yield the payloads in a JSONL archive (one JSON object per line), or a CSV archive with a header row. The format
+    is chosen by the file extension.
+    """
+    with open(path, 'r') as archive:
+        if os.path.splitext(path)[1].lower() == '.csv':
+            for row in csv.DictReader(archive):
+                yield row
+        else:
+            for line in archive:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def check_signatures(payloads, signature_secret, signature_method=None, processes=None, chunksize=1000):
+    """
+    Check the signature of each of an iterable of payloads, yielding a `bool` for each in order.
+
+    :param payloads: An iterable of `dict` payloads, each including its `sig` param.
+    :param signature_secret: The signature secret the payloads were signed with.
+    :param signature_method: The signature method ('md5', 'sha1', 'sha256' or 'sha512'), or `None` for an MD5 hash.
+    :param processes: The number of worker processes. Defaults to the number of CPUs; 1 checks in this process.
+    :param chunksize: The number of payloads sent to a worker at a time.
+    """
+    payloads = iter(payloads)
+    chunks = iter(lambda: list(itertools.islice(payloads, chunksize)), [])
+
+    if processes == 1:
+        _init_worker(signature_secret, signature_method)
+        for chunk in chunks:
+            for result in _check_chunk(chunk):
+                yield result
+        return
+
+    pool = multiprocessing.Pool(processes, _init_worker, (signature_secret, signature_method))
+    try:
+        pending = deque()
+        window = 2 * (processes or multiprocessing.cpu_count())
+
+        for chunk in chunks:
+            pending.append(pool.apply_async(_check_chunk, (chunk,)))
+            if len(pending) >= window:
+                for result in pending.popleft().get():
+                    yield result
+
+        while pending:
+            for result in pending.popleft().get():
+                yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def verify_archive(path, output, signature_secret, signature_method=None, processes=None, chunksize=1000):
+    """
+    Check the signatures of every payload in an archive, writing the results to a CSV file as they are produced.
+
+    Each output row holds the record number (counting from 1), the payload's `messageId` or `message-id` if it has one,
+    and 'pass' or 'fail'.
+
+    :return: A tuple of the number of payloads that passed and failed.
+    """
+    passed = failed = 0
+
+    def payloads():
+        for payload in read_archive(path):
+            ids.append(payload.get('messageId') or payload.get('message-id') or '')
+            yield payload
+
+    ids = deque()
+
+    with open(output, 'w') as results:
+        writer = csv.writer(results)
+        writer.writerow(['record', 'message_id', 'result'])
+
+        for record, valid in enumerate(check_signatures(payloads(), signature_secret, signature_method, processes,
+                                                        chunksize), 1):
+            writer.writerow([record, ids.popleft(), 'pass' if valid else 'fail'])
+            if valid:
+                passed += 1
+            else:
+                failed += 1
+
+    return passed, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Verify the signatures of archived Nexmo webhook payloads.')
+    parser.add_argument('archive', help='a JSONL or CSV file of payloads')
+    parser.add_argument('output', help='the CSV file to write results to')
+    parser.add_argument('--secret', default=os.environ.get('NEXMO_SIGNATURE_SECRET'),
+                        help='the signature secret (defaults to $NEXMO_SIGNATURE_SECRET)')
+    parser.add_argument('--method', default=os.environ.get('NEXMO_SIGNATURE_METHOD'),
+                        choices=['md5', 'sha1', 'sha256', 'sha512'], help='the signature method')
+    parser.add_argument('--processes', type=int, default=None, help='the number of worker processes')
+    parser.add_argument('--chunksize', type=int, default=1000, help='the number of payloads per chunk')
+    args = parser.parse_args(argv)
+
+    if not args.secret:
+        parser.error('a signature secret is required')
+
+    passed, failed = verify_archive(args.archive, args.output, args.secret, args.method, args.processes,
+                                    args.chunksize)
+    print('{0} passed, {1} failed'.format(passed, failed))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,150 @@
+"""
+Coalesce concurrent single-item lookups into multi-item API requests.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# The maximum number of ids accepted by a single /search/messages request.
+MAX_MESSAGE_IDS = 10
+
+# The maximum number of request ids accepted by a single /verify/search request.
+MAX_VERIFICATION_IDS = 10
+
+
+class Batcher(object):
+    """
+    Collect keys requested from many threads within a short window, look them up together, and fan the results back
+    out to each caller.
+
+    :param fetch: A callable taking a `list` of up to `max_batch` keys and returning a `dict` of results by key.
+        Keys missing from the `dict` resolve to `None`.
+    :param max_batch: The maximum number of keys to fetch at once.
+    :param window: The number of seconds to wait for more keys after the first key of a batch arrives.
+    :param workers: The maximum number of batches fetched concurrently.
+    """
+
+    def __init__(self, fetch, max_batch, window=0.05, workers=4):
+        self.fetch = fetch
+        self.max_batch = max_batch
+        self.window = window
+
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(workers)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, key):
+        """Request `key`, returning a `concurrent.futures.Future` for its result."""
+        future = Future()
+        self._start()
+        self._queue.put((key, future))
+        return future
+
+    def get(self, key, timeout=None):
+        """Request `key` and wait for its result."""
+        return self.submit(key).result(timeout)
+
+    def close(self):
+        """Fetch any keys still waiting, then stop."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+        self._executor.shutdown()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='nexmo-batcher')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = {}
+            deadline = time.time() + self.window
+
+            while item is not None:
+                key, future = item
+                batch.setdefault(key, []).append(future)
+                if len(batch) >= self.max_batch:
+                    break
+
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.time()))
+                except queue.Empty:
+                    break
+
+            self._executor.submit(self._fetch, batch)
+
+            if item is None:
+                return
+
+    def _fetch(self, batch):
+        try:
+            results = self.fetch(list(batch))
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    future.set_exception(e)
+            return
+
+        for key, futures in batch.items():
+            for future in futures:
+                future.set_result(results.get(key))
+
+
+class MessageLookupBatcher(Batcher):
+    """
+    A drop-in for `Client.get_message` that merges lookups made concurrently into `search_messages` requests for up
+    to ten ids at a time::
+
+        lookups = MessageLookupBatcher(client)
+
+        # From many threads:
+        message = lookups.get_message(message_id)
+    """
+
+    def __init__(self, client, window=0.05, workers=4):
+        super(MessageLookupBatcher, self).__init__(self._search, MAX_MESSAGE_IDS, window, workers)
+        self.client = client
+
+    def get_message(self, message_id):
+        """Return the message as `Client.get_message` would, or `None` if no message has the id."""
+        return self.get(message_id)
+
+    def _search(self, ids):
+        response = self.client.search_messages(ids=ids)
+        return dict((item['message-id'], item) for item in response.get('items') or [])
+
+
+class VerificationLookupBatcher(Batcher):
+    """
+    A drop-in for `Client.get_verification` that merges lookups made concurrently into `get_verifications`
+    requests for up to ten request ids at a time::
+
+        lookups = VerificationLookupBatcher(client)
+
+        # From many threads:
+        verification = lookups.get_verification(request_id)
+    """
+
+    def __init__(self, client, window=0.05, workers=4):
+        super(VerificationLookupBatcher, self).__init__(self._search, MAX_VERIFICATION_IDS, window, workers)
+        self.client = client
+
+    def get_verification(self, request_id):
+        """Return the verification as `Client.get_verification` would, or `None` if no verification has the id."""
+        return self.get(request_id)
+
+    def _search(self, request_ids):
+        return self.client.get_verifications(request_ids, workers=1)
@@ -0,0 +1,157 @@
+from collections import OrderedDict
+import json
+import sqlite3
+import threading
+import time
+
+
+class MemoryCache(object):
+    """
+    A bounded, thread-safe, in-memory mapping that evicts the least recently used entries. Entries may also be given a
+    time to live, after which they are treated as missing.
+
+    :param maxsize: The maximum number of entries to hold.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires = self._data.pop(key)
+            except KeyError:
+                return default
+            if expires is not None and expires <= time.time():
+                return default
+            self._data[key] = value, expires
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        :param ttl: The number of seconds the entry is valid for, or `None` for it not to expire.
+        """
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        """Set the entry only if there isn't a live one for `key`, returning `True` if it was set."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.time()):
+                return False
+            self._set(key, value, ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _set(self, key, value, ttl):
+        self._data.pop(key, None)
+        self._data[key] = value, None if ttl is None else time.time() + ttl
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (entry[1] is None or entry[1] > time.time())
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache(object):
+    """
+    A bounded mapping stored in an SQLite database, so that it survives restarts and can be shared between processes.
+
+    Values must be JSON-serializable. The least recently used entries are evicted once the cache grows beyond
+    `maxsize`; eviction is checked every `maxsize // 100` writes, so the cache may briefly overshoot by that much.
+    Entries may also be given a time to live, as for `MemoryCache`.
+
+    :param path: The path of the database file.
+    :param maxsize: The maximum number of entries to hold.
+    """
+
+    def __init__(self, path, maxsize=100000):
+        self.path = path
+        self.maxsize = maxsize
+        self._evict_every = max(1, maxsize // 100)
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, accessed REAL, expires REAL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+
+    def get(self, key, default=None):
+        with self._lock:
+            now = time.time()
+            row = self._db.execute('SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                                   (key, now)).fetchone()
+            if row is None:
+                return default
+            self._db.execute('UPDATE cache SET accessed = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        value = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+                             (key, value, now, None if ttl is None else now + ttl))
+            self._writes += 1
+            if self._writes % self._evict_every == 0:
+                self._evict()
+
+    def add(self, key, value, ttl=None):
+        """
+        Set the entry only if there isn't a live one for `key`, returning `True` if it was set. This is atomic across
+        processes sharing the database.
+        """
+        value = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                self._db.execute('DELETE FROM cache WHERE key = ? AND expires <= ?', (key, now))
+                cursor = self._db.execute('INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?)',
+                                          (key, value, now, None if ttl is None else now + ttl))
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+            return cursor.rowcount == 1
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM cache')
+
+    def close(self):
+        self._db.close()
+
+    def _evict(self):
+        self._db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        self._db.execute(
+            'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+            (self.maxsize,))
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                                    (key, time.time())).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
@@ -0,0 +1,128 @@
+import atexit
+from datetime import datetime
+import functools
+import threading
+import time
+import weakref
+
+import pytz
+
+from nexmo import Error, logger
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+class ConversionReporter(object):
+    """
+    Report SMS conversions from background threads, so that `report` never blocks on the network.
+
+    Conversions are held in a bounded in-memory queue and submitted with `client.submit_sms_conversion` by `workers`
+    threads. Failed submissions are retried up to `retries` times with exponential backoff. Call `close` on shutdown
+    to flush any conversions that are still queued; if it hasn't been called by the time the interpreter exits, the
+    queue is flushed then, for up to `exit_timeout` seconds::
+
+        reporter = ConversionReporter(client)
+        reporter.report(message_id)
+        ...
+        reporter.close()
+
+    :param client: The `nexmo.Client` to submit conversions with.
+    :param maxsize: The maximum number of conversions to hold before `report` starts dropping them.
+    :param workers: The number of conversions to submit concurrently.
+    :param retries: The number of times a failed submission is retried.
+    :param backoff: The delay in seconds before the first retry; each subsequent retry waits twice as long.
+    :param exit_timeout: The number of seconds to wait at interpreter exit for queued conversions to be submitted,
+        or `None` to not flush the queue at exit.
+    """
+
+    def __init__(self, client, maxsize=10000, workers=2, retries=3, backoff=1, exit_timeout=10):
+        self.client = client
+        self.retries = retries
+        self.backoff = backoff
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize)
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads = [threading.Thread(target=self._run, name='nexmo-conversions-{0}'.format(index))
+                         for index in range(workers)]
+
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+        # The hook only holds a weak reference, so that an abandoned reporter can still be garbage collected.
+        self._exit_hook = None
+        if exit_timeout is not None:
+            self._exit_hook = functools.partial(_close_at_exit, weakref.ref(self), exit_timeout)
+            atexit.register(self._exit_hook)
+
+    def report(self, message_id, delivered=True, timestamp=None):
+        """
+        Queue a conversion for submission. The arguments are the same as for `Client.submit_sms_conversion`, but the
+        timestamp defaults to the time `report` was called rather than the time the conversion is submitted.
+
+        :return: `True` if the conversion was queued, or `False` if the queue was full and it was dropped.
+        """
+        with self._lock:
+            if self._closed:
+                raise Error('ConversionReporter is closed')
+
+            try:
+                self._queue.put_nowait((message_id, delivered, timestamp or datetime.now(pytz.utc)))
+                return True
+            except queue.Full:
+                self.dropped += 1
+
+        logger.warning("Dropping SMS conversion for %r: queue is full", message_id)
+        return False
+
+    def close(self, timeout=None):
+        """
+        Stop accepting conversions, and wait up to `timeout` seconds for the queued conversions to be submitted.
+        """
+        with self._lock:
+            self._closed = True
+            exit_hook, self._exit_hook = self._exit_hook, None
+
+        # atexit.unregister is missing on Python 2, where the hook finds the reporter already closed instead.
+        if exit_hook is not None and hasattr(atexit, 'unregister'):
+            atexit.unregister(exit_hook)
+
+        # The workers exit once the queue has been drained.
+        self._stopping.set()
+
+        deadline = None if timeout is None else time.time() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0, deadline - time.time()))
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            self._submit(*item)
+
+    def _submit(self, message_id, delivered, timestamp):
+        for attempt in range(self.retries + 1):
+            try:
+                self.client.submit_sms_conversion(message_id, delivered, timestamp)
+                return
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.warning("Failed to submit SMS conversion for %r: %s", message_id, e)
+                else:
+                    time.sleep(self.backoff * 2 ** attempt)
+
+
+def _close_at_exit(reference, timeout):
+    reporter = reference()
+    if reporter is not None and reporter._exit_hook is not None:
+        reporter.close(timeout)
@@ -0,0 +1,118 @@
+import re
+
+# Every assigned ITU-T E.164 country calling code. Calling codes are prefix-free, so the code for a number is the
+# unique entry matching its first one, two or three digits.
+_COUNTRY_CODES = (
+    '1 7 20 27 30 31 32 33 34 36 39 40 41 43 44 45 46 47 48 49 51 52 53 54 55 56 57 58 60 61 62 63 64 65 66 81 82 84 '
+    '86 90 91 92 93 94 95 98 '
+    '211 212 213 216 218 220 221 222 223 224 225 226 227 228 229 230 231 232 233 234 235 236 237 238 239 240 241 242 '
+    '243 244 245 246 247 248 249 250 251 252 253 254 255 256 257 258 260 261 262 263 264 265 266 267 268 269 290 291 '
+    '297 298 299 350 351 352 353 354 355 356 357 358 359 370 371 372 373 374 375 376 377 378 379 380 381 382 383 385 '
+    '386 387 389 420 421 423 500 501 502 503 504 505 506 507 508 509 590 591 592 593 594 595 596 597 598 599 670 672 '
+    '673 674 675 676 677 678 679 680 681 682 683 685 686 687 688 689 690 691 692 800 808 850 852 853 855 856 870 878 '
+    '880 881 882 883 886 888 960 961 962 963 964 965 966 967 968 970 971 972 973 974 975 976 977 979 991 992 993 994 '
+    '995 996 998'
+).split()
+
+# The minimum and maximum length of the national significant number (the digits after the country code) for
+# countries where it is well defined. Other countries only get the generic E.164 bounds.
+_NATIONAL_LENGTHS = {
+    '1': (10, 10), '7': (10, 10), '20': (8, 10), '27': (9, 9), '30': (10, 10), '31': (9, 9), '32': (8, 9),
+    '33': (9, 9), '34': (9, 9), '36': (8, 9), '39': (6, 11), '40': (9, 9), '41': (9, 9), '43': (4, 13),
+    '44': (7, 10), '45': (8, 8), '46': (7, 13), '47': (5, 8), '48': (9, 9), '49': (5, 13), '51': (8, 9),
+    '52': (10, 10), '54': (10, 11), '55': (10, 11), '56': (9, 9), '57': (8, 10), '60': (8, 10), '61': (5, 9),
+    '62': (8, 12), '63': (8, 10), '64': (8, 10), '65': (8, 8), '66': (8, 9), '81': (9, 10), '82': (8, 10),
+    '84': (9, 10), '86': (9, 11), '90': (10, 10), '91': (10, 10), '92': (9, 10), '98': (10, 10), '234': (8, 10),
+    '254': (9, 9), '351': (9, 9), '353': (7, 9), '852': (8, 8), '886': (8, 9), '966': (8, 9), '971': (8, 9),
+    '972': (8, 9),
+}
+
+# Countries whose national numbers keep their leading zero when dialled internationally.
+_KEEP_TRUNK_PREFIX = frozenset(['39', '378', '379'])
+
+_MIN_LENGTH = 4
+_MAX_LENGTH = 15
+
+_TABLE = dict(
+    (code, _NATIONAL_LENGTHS.get(code, (_MIN_LENGTH, _MAX_LENGTH - len(code)))) for code in _COUNTRY_CODES)
+
+_SEPARATORS = re.compile(r'[\s().\-/]+')
+_DIGITS = re.compile(r'\A[0-9]+\Z')
+
+
+def country_code(number):
+    """
+    Return the country calling code of a normalized number, or `None` if it doesn't start with an assigned code.
+    """
+    for length in (1, 2, 3):
+        if number[:length] in _TABLE:
+            return number[:length]
+    return None
+
+
+def normalize(number, default_country_code=None):
+    """
+    Normalize a phone number to the E.164 digits (without the leading '+') expected by the Nexmo APIs.
+
+    Spaces and the separators `()-./` are removed. Numbers starting with '+' or '00' are treated as international;
+    other numbers are treated as national numbers in `default_country_code` if one is given (dropping the trunk
+    prefix), or as already being in international format otherwise.
+
+    :param number: The phone number to normalize.
+    :param default_country_code: The country calling code (such as '44') of numbers written in national format.
+    :return: The normalized number, or `None` if it is not a valid E.164 number.
+    """
+    number = _SEPARATORS.sub('', number)
+
+    if number.startswith('+'):
+        number = number[1:]
+    elif number.startswith('00'):
+        number = number[2:]
+    elif default_country_code is not None:
+        if default_country_code == '1':
+            if len(number) == 11 and number.startswith('1'):
+                number = number[1:]
+        elif number.startswith('0') and default_country_code not in _KEEP_TRUNK_PREFIX:
+            number = number[1:]
+        number = default_country_code + number
+
+    if not _DIGITS.match(number) or len(number) > _MAX_LENGTH:
+        return None
+
+    code = country_code(number)
+    if code is None:
+        return None
+
+    minimum, maximum = _TABLE[code]
+    if not minimum <= len(number) - len(code) <= maximum:
+        return None
+
+    return number
+
+
+def is_valid(number, default_country_code=None):
+    """Return `True` if `number` normalizes to a valid E.164 number."""
+    return normalize(number, default_country_code) is not None
+
+
+def normalize_many(numbers, default_country_code=None):
+    """
+    Normalize an iterable of phone numbers, yielding an `(original, normalized)` tuple for each.
+
+    `normalized` is `None` for invalid numbers. This is a generator, so it can stream over arbitrarily many rows.
+    """
+    for number in numbers:
+        yield number, normalize(number, default_country_code)
+
+
+def valid_numbers(numbers, default_country_code=None):
+    """
+    Normalize an iterable of phone numbers, yielding only the valid numbers in normalized form.
+
+    The output can be passed straight to the `to` param of `send_message` or the `number` param of the
+    Number Insight methods.
+    """
+    for number in numbers:
+        number = normalize(number, default_country_code)
+        if number is not None:
+            yield number
@@ -0,0 +1,266 @@
+"""
+Export calls and messages over a date range, fetching many time windows concurrently.
+
+The range is split into windows that are paged through in parallel. A window holding more than `max_window_records`
+calls is split in half until each part is small enough. Each finished window is written to the sink and recorded in an
+optional checkpoint file, so an interrupted export resumes where it stopped. It can also be run as a script::
+
+    python -m nexmo.export calls 2018-01-01 2018-02-01 calls.jsonl --checkpoint calls.checkpoint \\
+        --application-id APP_ID --private-key private.key
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+import argparse
+import csv
+import json
+import os
+import threading
+
+import nexmo
+from nexmo.pagination import MAX_PAGE_SIZE
+
+_DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+class JSONLinesSink(object):
+    """Write records to a file as JSON, one per line, appending to any records already there."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a')
+
+    def read_ids(self, id_key):
+        with open(self.path) as f:
+            return set(json.loads(line).get(id_key) for line in f if line.strip())
+
+    def write(self, records):
+        for record in records:
+            self._file.write(json.dumps(record, sort_keys=True) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class CSVSink(object):
+    """
+    Write records to a CSV file, appending to any records already there. Nested values are written as JSON.
+
+    :param fields: The fields to write. Defaults to the existing header, or the keys of the first record written.
+    """
+
+    def __init__(self, path, fields=None):
+        self.path = path
+        self.fields = fields
+
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path) as f:
+                self.fields = self.fields or next(csv.reader(f))
+            self._header = False
+        else:
+            self._header = True
+
+        self._file = open(path, 'a')
+        self._writer = None
+
+    def read_ids(self, id_key):
+        with open(self.path) as f:
+            return set(row.get(id_key) for row in csv.DictReader(f))
+
+    def write(self, records):
+        for record in records:
+            if self._writer is None:
+                self.fields = self.fields or sorted(record)
+                self._writer = csv.DictWriter(self._file, self.fields, extrasaction='ignore')
+                if self._header:
+                    self._writer.writeheader()
+
+            row = dict((key, json.dumps(value) if isinstance(value, (dict, list)) else value)
+                       for key, value in record.items())
+            self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class Exporter(object):
+    """
+    Export records window by window, concurrently, deduplicating records by `id_key`.
+
+    :param sink: A `JSONLinesSink`, `CSVSink` or any object with `write(records)` and `read_ids(id_key)` methods.
+    :param id_key: The field that uniquely identifies a record.
+    :param checkpoint: The path of a file listing finished windows, or `None` to disable checkpointing.
+    :param workers: The number of windows fetched concurrently.
+    """
+
+    def __init__(self, sink, id_key, checkpoint=None, workers=4):
+        self.sink = sink
+        self.id_key = id_key
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.exported = 0
+
+        self._lock = threading.Lock()
+        self._finished = set()
+        self._seen = set()
+
+        if checkpoint is not None and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                self._finished = set(tuple(json.loads(line)) for line in f if line.strip())
+            self._seen = self.sink.read_ids(id_key)
+
+    def run(self, windows, export_window):
+        """
+        Export each window.
+
+        :param windows: An iterable of windows, each a tuple of JSON-serializable values.
+        :param export_window: A callable taking a window and returning a tuple of the `list` of records in it and a
+            `list` of smaller windows to export in its place (when it is too large to export at once).
+        :return: The number of records written.
+        """
+        with ThreadPoolExecutor(self.workers) as executor:
+            pending = set()
+
+            def submit(window):
+                if tuple(window) not in self._finished:
+                    pending.add(executor.submit(self._export, tuple(window), export_window))
+
+            for window in windows:
+                submit(window)
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for window in future.result():
+                        submit(window)
+
+        return self.exported
+
+    def _export(self, window, export_window):
+        records, windows = export_window(window)
+        if windows:
+            return windows
+
+        with self._lock:
+            fresh = []
+            for record in records:
+                if record.get(self.id_key) not in self._seen:
+                    self._seen.add(record.get(self.id_key))
+                    fresh.append(record)
+
+            self.sink.write(fresh)
+            self.exported += len(fresh)
+
+            if self.checkpoint is not None:
+                with open(self.checkpoint, 'a') as f:
+                    f.write(json.dumps(list(window)) + '\n')
+            self._finished.add(window)
+
+        return []
+
+
+def export_calls(client, start, end, sink, window=timedelta(days=1), max_window_records=5000,
+                 min_window=timedelta(minutes=1), checkpoint=None, workers=4, params=None):
+    """
+    Export every call started between `start` and `end` to `sink`.
+
+    :param client: The `nexmo.Client` to fetch calls with.
+    :param start: The `datetime` (UTC) to export from.
+    :param end: The `datetime` (UTC) to export up to.
+    :param sink: Where to write the calls, such as a `JSONLinesSink`.
+    :param window: The length of the initial time windows.
+    :param max_window_records: Windows with more calls than this are split in half, down to `min_window` long.
+    :param checkpoint: The path of a checkpoint file to resume from and record progress in.
+    :param workers: The number of windows fetched concurrently.
+    :param params: Any other params for `get_calls`, such as `status`.
+    :return: The number of calls written.
+    """
+    params = dict(params or {})
+
+    def export_window(bounds):
+        window_start, window_end = [datetime.strptime(bound, _DATE_FORMAT) for bound in bounds]
+        page_params = dict(params, date_start=bounds[0], date_end=bounds[1], page_size=MAX_PAGE_SIZE)
+
+        first = client.get_calls(dict(page_params, record_index=0))
+        count = int(first.get('count') or 0)
+
+        if count > max_window_records and window_end - window_start > min_window:
+            middle = window_start + (window_end - window_start) // 2
+            return [], [_window(window_start, middle), _window(middle, window_end)]
+
+        records = list((first.get('_embedded') or {}).get('calls') or [])
+        if count > len(records):
+            records.extend(client.iter_calls(dict(page_params, record_index=len(records))))
+
+        return records, []
+
+    windows = []
+    while start < end:
+        windows.append(_window(start, min(start + window, end)))
+        start += window
+
+    return Exporter(sink, 'uuid', checkpoint, workers).run(windows, export_window)
+
+
+def export_messages(client, to, start, end, sink, checkpoint=None, workers=4):
+    """
+    Export the messages sent to each of the numbers in `to` on each day from `start` to `end` inclusive.
+
+    `search_messages` only searches by recipient and day, so each (recipient, day) pair is fetched as a window.
+
+    :param to: An iterable of the recipient numbers to export messages for.
+    :param start: The first `date` to export.
+    :param end: The last `date` to export.
+    :return: The number of messages written.
+    """
+    days = [(start + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range((end - start).days + 1)]
+
+    def export_window(window):
+        number, day = window
+        return client.search_messages(date=day, to=number).get('items') or [], []
+
+    windows = [(number, day) for number in to for day in days]
+    return Exporter(sink, 'message-id', checkpoint, workers).run(windows, export_window)
+
+
+def _window(start, end):
+    return start.strftime(_DATE_FORMAT), end.strftime(_DATE_FORMAT)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export Nexmo calls or messages.')
+    parser.add_argument('kind', choices=['calls', 'messages'])
+    parser.add_argument('start', help='the first date to export, as YYYY-MM-DD')
+    parser.add_argument('end', help='the date to export up to (calls) or the last date to export (messages)')
+    parser.add_argument('output', help='the .jsonl or .csv file to write to')
+    parser.add_argument('--to', action='append', default=[], help='a recipient to export messages for')
+    parser.add_argument('--checkpoint', help='a checkpoint file to resume from and record progress in')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--window-hours', type=float, default=24, help='the initial window length for calls')
+    parser.add_argument('--application-id', help='the application id, for exporting calls')
+    parser.add_argument('--private-key', help='the path of the private key, for exporting calls')
+    args = parser.parse_args(argv)
+
+    start = datetime.strptime(args.start, '%Y-%m-%d')
+    end = datetime.strptime(args.end, '%Y-%m-%d')
+
+    client = nexmo.Client(application_id=args.application_id, private_key=args.private_key)
+    sink = CSVSink(args.output) if args.output.lower().endswith('.csv') else JSONLinesSink(args.output)
+
+    try:
+        if args.kind == 'calls':
+            count = export_calls(client, start, end, sink, timedelta(hours=args.window_hours),
+                                 checkpoint=args.checkpoint, workers=args.workers)
+        else:
+            if not args.to:
+                parser.error('--to is required when exporting messages')
+            count = export_messages(client, args.to, start.date(), end.date(), sink, args.checkpoint, args.workers)
+    finally:
+        sink.close()
+
+    print('Exported {0} {1}'.format(count, args.kind))
+
+
+if __name__ == '__main__':
+    main()
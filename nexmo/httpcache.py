@@ -0,0 +1,143 @@
+"""
+Cache GET responses, revalidating them with conditional requests once they go stale.
+"""
+import copy
+from email.utils import mktime_tz, parsedate_tz
+import re
+import sys
+import time
+
+from nexmo.cache import MemoryCache
+
+if sys.version_info[0] == 3:
+    from urllib.parse import urlencode
+else:
+    from urllib import urlencode
+
+_DIRECTIVE = re.compile(r'([\w-]+)(?:=("[^"]*"|[^,\s]*))?')
+
+
+class HTTPCache(object):
+    """
+    A cache of JSON GET responses for `nexmo.Client`, which follows the `Cache-Control` and `Expires` headers and
+    revalidates stale responses with their `ETag` or `Last-Modified` validators.
+
+    Pass the cache to `nexmo.Client` as `http_cache`. A fresh response is returned without a request. A stale one
+    is revalidated with `If-None-Match` or `If-Modified-Since`, and a 304 response is answered from the cache
+    without downloading the body again. Responses marked `no-store`, and responses with neither a freshness
+    lifetime nor a validator, are not cached. When the client changes a resource with a successful POST, PUT or
+    DELETE, the responses cached for it and for its parent collection are dropped.
+
+    :param backend: Where to store responses: a `nexmo.cache.MemoryCache` (the default, holding the responses for
+        1000 URIs) or a `nexmo.cache.SQLiteCache` to keep them on disk. The backend's `maxsize` bounds the number of
+        URIs cached.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else MemoryCache(maxsize=1000)
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    def fetch(self, key, send, parse):
+        """
+        Return the response for `key` from the cache, or by sending a request. Cached responses are copied, so
+        callers may modify them freely.
+
+        :param key: The cache key of the request, from `cache_key`.
+        :param send: A callable taking a `dict` of extra headers, which sends the request and returns the response.
+        :param parse: A callable taking the response and returning the parsed result.
+        """
+        # Responses are stored together by URI, so that `invalidate` can drop them whatever their params.
+        uri, query = key.split('?', 1)
+        entries = dict(self.backend.get(uri) or {})
+        entry = entries.get(query)
+
+        if entry is not None and entry['expires'] > time.time():
+            self.hits += 1
+            return copy.deepcopy(entry['value'])
+
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = send(headers)
+
+        if response.status_code == 304 and entry is not None:
+            self.revalidations += 1
+            entry = entries[query] = dict(entry)
+            storable, entry['expires'] = _freshness(response.headers)
+            entry['etag'] = response.headers.get('ETag') or entry.get('etag')
+            entry['last_modified'] = response.headers.get('Last-Modified') or entry.get('last_modified')
+            if not storable:
+                del entries[query]
+            self._store(uri, entries)
+            return copy.deepcopy(entry['value'])
+
+        self.misses += 1
+        value = parse(response)
+
+        storable, expires = _freshness(response.headers)
+        etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+        if (response.status_code == 200 and isinstance(value, (dict, list)) and storable and
+                (expires > time.time() or etag or last_modified)):
+            entries[query] = {'value': copy.deepcopy(value), 'expires': expires, 'etag': etag,
+                              'last_modified': last_modified}
+            self._store(uri, entries)
+        elif entry is not None:
+            del entries[query]
+            self._store(uri, entries)
+
+        return value
+
+    def invalidate(self, uri):
+        """Drop every cached response for `uri`, whatever the params it was requested with."""
+        self.backend.delete(uri)
+
+    def clear(self):
+        self.backend.clear()
+
+    def _store(self, uri, entries):
+        if entries:
+            self.backend.set(uri, entries)
+        else:
+            self.backend.delete(uri)
+
+
+def cache_key(uri, params):
+    """Build the cache key of a GET request, leaving out the API secret so that it isn't stored."""
+    params = sorted((key, value) for key, value in (params or {}).items()
+                    if key != 'api_secret' and value is not None)
+    return uri + '?' + urlencode(params)
+
+
+def _freshness(headers):
+    """Return whether a response may be stored, and the time until which it is fresh."""
+    now = time.time()
+    directives = dict((name.lower(), value.strip('"'))
+                      for name, value in _DIRECTIVE.findall(headers.get('Cache-Control') or ''))
+
+    if 'no-store' in directives:
+        return False, now
+    if 'no-cache' in directives:
+        return True, now
+
+    if 'max-age' in directives:
+        try:
+            return True, now + int(directives['max-age']) - int(headers.get('Age') or 0)
+        except ValueError:
+            return True, now
+
+    if headers.get('Expires'):
+        expires = parsedate_tz(headers['Expires'])
+        date = parsedate_tz(headers.get('Date') or '')
+        if expires is None:
+            return True, now
+        # Measure the lifetime against the server's clock, in case the local clock differs.
+        return True, now + mktime_tz(expires) - (mktime_tz(date) if date is not None else now)
+
+    return True, now
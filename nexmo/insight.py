@@ -0,0 +1,264 @@
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import threading
+import time
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from nexmo import ClientError, Error, e164
+from nexmo.cache import MemoryCache
+from nexmo.ratelimit import RateLimiter
+from nexmo.webhooks import wsgi_app
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# Number Insight levels, from least to most detailed. Each level's response includes everything in the levels before.
+LEVELS = ('basic', 'standard', 'advanced')
+
+DEFAULT_TTLS = {
+    'basic': 30 * 86400,
+    'standard': 86400,
+    'advanced': 900,
+}
+
+
+class InsightCache(object):
+    """
+    A cache of Number Insight results, keyed on the number and insight level.
+
+    Pass the cache to `nexmo.Client` as `insight_cache` and successful results of `get_basic_number_insight`,
+    `get_standard_number_insight` and `get_advanced_number_insight` are cached. A cached result from a more detailed
+    level also answers requests for a less detailed one, so a cached advanced lookup satisfies a later basic lookup.
+
+    :param backend: Where to store results: a `nexmo.cache.MemoryCache` (the default, holding 10000 results) or a
+        `nexmo.cache.SQLiteCache` to share results between processes.
+    :param ttls: A `dict` of the number of seconds results are kept for, by level. Defaults to `DEFAULT_TTLS`.
+    """
+
+    def __init__(self, backend=None, ttls=None):
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.hits = dict((level, 0) for level in LEVELS)
+        self.misses = dict((level, 0) for level in LEVELS)
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self):
+        """A `dict` of the numbers of hits and misses by level."""
+        return {'hits': dict(self.hits), 'misses': dict(self.misses)}
+
+    def get(self, level, params):
+        """Return a copy of the cached result for the params at `level` or any more detailed level, or `None`."""
+        for candidate in LEVELS[LEVELS.index(level):]:
+            result = self.backend.get(_key(candidate, params))
+            if result is not None:
+                with self._lock:
+                    self.hits[level] += 1
+                return copy.deepcopy(result)
+
+        with self._lock:
+            self.misses[level] += 1
+        return None
+
+    def set(self, level, params, result):
+        self.backend.set(_key(level, params), copy.deepcopy(result), self.ttls[level])
+
+
+InsightResult = namedtuple('InsightResult', ['number', 'request_id', 'result', 'error'])
+
+
+class InsightPipeline(object):
+    """
+    Submit asynchronous Number Insight requests in bulk and collect the results posted back to a local callback
+    receiver::
+
+        with InsightPipeline(client, callback_url='https://example.com/insight', port=8080) as pipeline:
+            for result in pipeline.run(numbers):
+                ...
+
+    Numbers are submitted with `Client.request_number_insight` by `workers` threads, no faster than `rate` per
+    second. Each accepted request is held in a table of outstanding request ids until its callback arrives or
+    `timeout` seconds pass. At most `max_outstanding` requests are outstanding at once, so the table stays small
+    however many numbers are submitted.
+
+    :param client: The `nexmo.Client` to submit requests with.
+    :param callback_url: The URL Nexmo posts results to, which must reach the receiver. Defaults to the receiver's
+        own address, which only works when it is publicly reachable.
+    :param host: The interface the receiver listens on.
+    :param port: The port the receiver listens on. Defaults to a free port.
+    :param serve: `False` to not run a receiver, and instead pass callbacks from an existing webhook endpoint to
+        `receive`.
+    :param rate: The maximum number of requests submitted per second.
+    :param workers: The number of requests submitted concurrently.
+    :param timeout: The number of seconds to wait for each callback.
+    :param max_outstanding: The maximum number of requests awaiting results.
+    :param params: Any other params for `request_number_insight`, such as `features`.
+    """
+
+    def __init__(self, client, callback_url=None, host='127.0.0.1', port=0, serve=True, rate=10, workers=8,
+                 timeout=300, max_outstanding=10000, params=None):
+        self.client = client
+        self.limiter = RateLimiter(rate)
+        self.workers = workers
+        self.timeout = timeout
+        self.max_outstanding = max_outstanding
+        self.params = dict(params or {})
+
+        if not serve and callback_url is None:
+            raise ValueError('A callback_url is required when serve is False')
+
+        self.server = None
+        if serve:
+            self.server = make_server(host, port, wsgi_app(callback=self._receive_event), handler_class=_QuietHandler)
+            thread = threading.Thread(target=self.server.serve_forever, name='nexmo-insight-receiver')
+            thread.daemon = True
+            thread.start()
+
+        self.callback_url = callback_url or 'http://{0}:{1}/'.format(*self.address)
+
+        self._lock = threading.Lock()
+        self._outstanding = OrderedDict()
+        self._early = OrderedDict()
+        self._results = queue.Queue()
+
+    @property
+    def address(self):
+        """The `(host, port)` the receiver is listening on."""
+        return self.server.server_address[:2] if self.server is not None else None
+
+    def run(self, numbers):
+        """
+        Submit a request for each number and yield an `InsightResult` for each as it completes, in completion order.
+
+        `result` holds the params of the callback, or of the rejected submission. `error` is `None` on success, or
+        the exception raised by the submission, a `ClientError` if it was rejected, or an `Error` if no callback
+        arrived in time.
+
+        :param numbers: An iterable of numbers, which may be a generator too large to hold in memory.
+        """
+        slots = threading.Semaphore(self.max_outstanding)
+        stopped = threading.Event()
+        fed = threading.Event()
+        submitted = [0]
+        executor = ThreadPoolExecutor(self.workers)
+
+        def feed():
+            try:
+                for number in numbers:
+                    while not slots.acquire(False):
+                        if stopped.wait(0.05):
+                            return
+                    if stopped.is_set():
+                        return
+                    self.limiter.acquire()
+                    submitted[0] += 1
+                    executor.submit(self._submit, number)
+            finally:
+                fed.set()
+
+        thread = threading.Thread(target=feed, name='nexmo-insight-feeder')
+        thread.daemon = True
+        thread.start()
+
+        completed = 0
+        try:
+            while not (fed.is_set() and completed == submitted[0]):
+                try:
+                    result = self._results.get(timeout=0.1)
+                except queue.Empty:
+                    self._expire()
+                    continue
+
+                slots.release()
+                completed += 1
+                yield result
+                self._expire()
+        finally:
+            stopped.set()
+            executor.shutdown(wait=False)
+
+    def receive(self, params):
+        """Handle the params of a Number Insight callback."""
+        request_id = params.get('request_id')
+
+        with self._lock:
+            entry = self._outstanding.pop(request_id, None)
+            if entry is None:
+                # The callback beat the submission's response; `_submit` picks it up.
+                self._early[request_id] = params, time.time()
+                return
+
+        self._results.put(InsightResult(entry[0], request_id, params, None))
+
+    def close(self):
+        """Stop the receiver."""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _receive_event(self, event):
+        self.receive(event.params)
+
+    def _submit(self, number):
+        try:
+            response = self.client.request_number_insight(dict(self.params, number=number, callback=self.callback_url))
+        except Exception as e:
+            self._results.put(InsightResult(number, None, None, e))
+            return
+
+        request_id = response.get('request_id')
+
+        if str(response.get('status')) != '0':
+            error = ClientError('Number Insight request rejected: {0}'.format(response.get('status_message')))
+            self._results.put(InsightResult(number, request_id, response, error))
+            return
+
+        with self._lock:
+            early = self._early.pop(request_id, None)
+            if early is None:
+                self._outstanding[request_id] = number, time.time() + self.timeout
+                return
+
+        self._results.put(InsightResult(number, request_id, early[0], None))
+
+    def _expire(self):
+        now = time.time()
+        expired = []
+
+        with self._lock:
+            # Requests are added in submission order, so the earliest deadlines are at the front.
+            while self._outstanding:
+                request_id, (number, deadline) = next(iter(self._outstanding.items()))
+                if deadline > now:
+                    break
+                del self._outstanding[request_id]
+                expired.append((number, request_id))
+
+            # Drop callbacks that arrived for requests that had already timed out.
+            while self._early and next(iter(self._early.values()))[1] <= now - self.timeout:
+                self._early.popitem(last=False)
+
+        for number, request_id in expired:
+            error = Error('Timed out waiting for the Number Insight callback for {0}'.format(request_id))
+            self._results.put(InsightResult(number, request_id, None, error))
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _key(level, params):
+    params = dict(params)
+    number = str(params.pop('number', ''))
+    options = '&'.join('{0}={1}'.format(key, params[key]) for key in sorted(params))
+    return '{0}:{1}:{2}'.format(level, e164.normalize(number) or number, options)
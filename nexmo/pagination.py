@@ -0,0 +1,123 @@
+"""
+Iterate over the items of paged list endpoints, fetching the following pages in the background.
+"""
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# The largest page size accepted by the paged list endpoints.
+MAX_PAGE_SIZE = 100
+
+
+def iterate_pages(fetch_page, prefetch=1):
+    """
+    Yield the items of each page in turn.
+
+    :param fetch_page: A callable taking a page number (counting from 0) and returning a tuple of the `list` of items
+        on the page and whether there are more pages after it.
+    :param prefetch: The number of pages to fetch ahead of the page being consumed, in a background thread. With 0,
+        each page is fetched only when the previous one has been consumed. Pages beyond those are never fetched if
+        the caller stops iterating early.
+    """
+    if prefetch <= 0:
+        number = 0
+        while True:
+            items, more = fetch_page(number)
+            for item in items:
+                yield item
+            if not more:
+                return
+            number += 1
+
+    pages = queue.Queue()
+    slots = threading.Semaphore(prefetch)
+    stopped = threading.Event()
+
+    def produce():
+        number = 0
+        try:
+            while True:
+                while not slots.acquire(False):
+                    if stopped.wait(0.05):
+                        return
+                if stopped.is_set():
+                    return
+
+                items, more = fetch_page(number)
+                pages.put((items, more, None))
+                if not more:
+                    return
+                number += 1
+        except Exception as e:
+            pages.put((None, False, e))
+
+    thread = threading.Thread(target=produce, name='nexmo-prefetch')
+    thread.daemon = True
+    thread.start()
+
+    try:
+        while True:
+            items, more, error = pages.get()
+            slots.release()
+            if error is not None:
+                raise error
+            for item in items:
+                yield item
+            if not more:
+                return
+    finally:
+        stopped.set()
+
+
+def paginate(fetch, params, path, index_param, size_param, first_index=0, offset=False, prefetch=1, stream=False):
+    """
+    Yield every item from a paged list endpoint.
+
+    :param fetch: A callable taking a `dict` of params and returning a page of results.
+    :param params: The params for the first page. The page index and size params are filled in if missing.
+    :param path: The sequence of keys leading to the list of items in each page of results.
+    :param index_param: The name of the page index param.
+    :param size_param: The name of the page size param.
+    :param first_index: The index of the first page.
+    :param offset: `True` if the index param is a record offset rather than a page number.
+    :param prefetch: The number of pages to fetch ahead, as for `iterate_pages`.
+    :param stream: `True` if `fetch` returns an iterator over the items of the page rather than the page itself. Pages
+        are then fetched one at a time, as each is parsed while it is consumed.
+    """
+    params = dict(params or {})
+    size = int(params.setdefault(size_param, MAX_PAGE_SIZE))
+    start = int(params.get(index_param, first_index))
+
+    def page_index(number):
+        return start + number * size if offset else start + number
+
+    def fetch_page(number):
+        index = page_index(number)
+        response = fetch(dict(params, **{index_param: index}))
+
+        items = response
+        for key in path:
+            items = (items or {}).get(key)
+        items = items or []
+
+        fetched = index + len(items) if offset else (index - first_index + 1) * size
+        count = response.get('count')
+        more = len(items) >= size and (count is None or fetched < int(count))
+
+        return items, more
+
+    def stream_pages():
+        number = 0
+        while True:
+            count = 0
+            for item in fetch(dict(params, **{index_param: page_index(number)})):
+                count += 1
+                yield item
+            if count < size:
+                return
+            number += 1
+
+    return stream_pages() if stream else iterate_pages(fetch_page, prefetch)
@@ -0,0 +1,164 @@
+import threading
+import time
+
+from nexmo import AuthenticationError, Client, ClientError, Error, logger
+from nexmo.ratelimit import RateLimiter
+
+# SMS API status code for a message rejected because the key is sending too fast.
+_THROTTLED_STATUS = '1'
+
+# Client methods that don't call the API, and depend on a single client's state, so aren't pooled. The `iter_`
+# methods aren't pooled either, as their requests are made lazily, after the call has returned its key to the pool.
+_LOCAL_METHODS = frozenset([
+    'auth', 'check_signature', 'check_signatures', 'signature', 'parse', 'parse_stream',
+])
+
+
+class _PooledKey(object):
+    def __init__(self, client, weight, limiter):
+        self.client = client
+        self.weight = float(weight)
+        self.limiter = limiter
+        self.in_flight = 0
+        self.calls = 0
+        self.throttled = 0
+        self.suspended_until = 0
+        self.disabled = False
+
+    def available(self, now):
+        return not self.disabled and self.suspended_until <= now
+
+    def load(self):
+        delay = self.limiter.delay() if self.limiter else 0
+        return delay, self.in_flight / self.weight, self.calls / self.weight
+
+
+class KeyPool(object):
+    """
+    Spread API calls across several API keys.
+
+    Any `Client` method that calls the API, other than the lazy `iter_` methods, can be called on the pool; each call
+    is routed to the least-loaded key that is not being rate limited, with ties broken by weight. Keys that fail to
+    authenticate are removed from rotation, and keys that are throttled `max_throttled` times in a row are suspended
+    for `cooldown` seconds. Throttled calls, and SMS sends whose messages were all throttled, are retried on another
+    key; if every key fails, the last key's error is raised.
+
+    :param credentials: A list of `(key, secret)` tuples, or of dicts containing `key` and `secret` along with an
+        optional `weight` and `rate` (the maximum calls per second permitted for that key).
+    :param max_throttled: The number of consecutive throttled responses before a key is suspended.
+    :param cooldown: The number of seconds a throttled key is suspended for.
+    :param kwargs: Any other arguments are passed through to each `Client`.
+    """
+
+    def __init__(self, credentials, max_throttled=3, cooldown=60, **kwargs):
+        self.max_throttled = max_throttled
+        self.cooldown = cooldown
+
+        self._keys = []
+        self._lock = threading.Lock()
+
+        for credential in credentials:
+            if isinstance(credential, dict):
+                credential = dict(credential)
+            else:
+                key, secret = credential
+                credential = {'key': key, 'secret': secret}
+
+            weight = credential.pop('weight', 1)
+            rate = credential.pop('rate', None)
+            client = Client(**dict(kwargs, **credential))
+
+            self._keys.append(_PooledKey(client, weight, RateLimiter(rate) if rate else None))
+
+        if not self._keys:
+            raise ValueError('KeyPool requires at least one credential')
+
+    @property
+    def active_keys(self):
+        now = time.time()
+        return [key.client.api_key for key in self._keys if key.available(now)]
+
+    def __getattr__(self, name):
+        if (name.startswith(('_', 'iter_')) or name in _LOCAL_METHODS or
+                not callable(getattr(Client, name, None))):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            return self._call(name, args, kwargs)
+
+        return call
+
+    def _call(self, name, args, kwargs):
+        response = error = None
+
+        for _ in range(len(self._keys)):
+            key = self._acquire()
+            try:
+                response = getattr(key.client, name)(*args, **kwargs)
+            except AuthenticationError as e:
+                logger.warning("Removing API key %r from the pool: authentication failed", key.client.api_key)
+                key.disabled = True
+                error = e
+                continue
+            except ClientError as e:
+                if e.status_code != 429:
+                    raise
+                self._record_throttled(key)
+                error = e
+                continue
+            finally:
+                self._release(key)
+
+            if not _is_throttled_response(response):
+                key.throttled = 0
+                return response
+
+            self._record_throttled(key)
+
+        if response is not None:
+            # Every key tried was throttled; the caller can see which messages weren't sent.
+            return response
+
+        # Every key tried failed; raise the last key's error, which carries its status code.
+        raise error
+
+    def _acquire(self):
+        while True:
+            with self._lock:
+                now = time.time()
+                candidates = [key for key in self._keys if key.available(now)]
+
+                if candidates:
+                    key = min(candidates, key=_PooledKey.load)
+                    if key.limiter is None or key.limiter.try_acquire():
+                        key.in_flight += 1
+                        key.calls += 1
+                        return key
+                    wait = key.limiter.delay()
+                else:
+                    suspended = [key.suspended_until for key in self._keys if not key.disabled]
+                    if not suspended:
+                        raise Error('No API keys available in the pool')
+                    wait = min(suspended) - now
+
+            time.sleep(max(wait, 0))
+
+    def _release(self, key):
+        with self._lock:
+            key.in_flight -= 1
+
+    def _record_throttled(self, key):
+        with self._lock:
+            key.throttled += 1
+            if key.throttled >= self.max_throttled:
+                logger.warning("Suspending API key %r for %ss: throttled", key.client.api_key, self.cooldown)
+                key.suspended_until = time.time() + self.cooldown
+                key.throttled = 0
+
+
+def _is_throttled_response(response):
+    # Only retry when no message was sent, so that a partly sent long message isn't sent twice.
+    if not isinstance(response, dict):
+        return False
+    messages = response.get('messages') or []
+    return bool(messages) and all(message.get('status') == _THROTTLED_STATUS for message in messages)
@@ -0,0 +1,388 @@
+"""
+Manage the numbers rented by an account.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import threading
+import time
+
+from nexmo import ClientError, logger
+from nexmo.pagination import paginate
+from nexmo.ratelimit import RateLimiter
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# The fields of a number that are indexed, other than its msisdn.
+INDEXED_FIELDS = ('country', 'feature', 'type', 'application_id')
+
+# The settings that `update_number` changes.
+NUMBER_SETTINGS = ('app_id', 'moHttpUrl', 'moSmsSmsc', 'voiceCallbackType', 'voiceCallbackValue',
+                   'voiceStatusCallback', 'messagesCallbackType', 'messagesCallbackValue')
+
+BUY = 'buy'
+UPDATE = 'update'
+CANCEL = 'cancel'
+UNCHANGED = 'unchanged'
+
+NumberResult = namedtuple('NumberResult', ['msisdn', 'action', 'changes', 'error'])
+
+
+class NumberIndex(object):
+    """
+    A local index of the account's numbers, so that routing and sender selection never need to call
+    `get_account_numbers`.
+
+    Numbers are indexed by msisdn, country, feature, type and linked application. `refresh` brings the index up to
+    date with `iter_account_numbers`, re-indexing only the numbers that changed; `start` runs it in a background
+    thread. Buying, cancelling and updating numbers through the index's `buy_number`, `cancel_number` and
+    `update_number` updates it immediately::
+
+        numbers = NumberIndex(client)
+        numbers.start(interval=300)
+
+        senders = numbers.find(country='GB', feature='SMS')
+
+    :param client: The `nexmo.Client` to fetch and manage numbers with.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.refreshed_at = None
+
+        self._numbers = {}
+        self._index = dict((field, {}) for field in INDEXED_FIELDS)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def get(self, msisdn):
+        """Return the number's details, as returned by `get_account_numbers`, or `None` if it isn't rented."""
+        return self._numbers.get(str(msisdn))
+
+    def find(self, country=None, feature=None, type=None, application_id=None):
+        """
+        Return a `list` of the details of the numbers matching every given criterion, sorted by msisdn.
+
+        :param feature: A feature such as 'SMS' or 'VOICE'.
+        :param application_id: The id of the application the number is linked to.
+        """
+        criteria = zip(INDEXED_FIELDS, (country, feature, type, application_id))
+
+        with self._lock:
+            matches = None
+            for field, value in criteria:
+                if value is not None:
+                    msisdns = self._index[field].get(value, set())
+                    matches = set(msisdns) if matches is None else matches & msisdns
+            if matches is None:
+                matches = self._numbers
+
+            return [self._numbers[msisdn] for msisdn in sorted(matches)]
+
+    def refresh(self):
+        """
+        Fetch every number with `iter_account_numbers` and apply the differences to the index.
+
+        :return: A tuple of the sets of msisdns that were added, removed and changed.
+        """
+        numbers = dict((str(number['msisdn']), number) for number in self.client.iter_account_numbers())
+
+        with self._lock:
+            added = set(numbers) - set(self._numbers)
+            removed = set(self._numbers) - set(numbers)
+            changed = set(msisdn for msisdn in set(numbers) & set(self._numbers)
+                          if numbers[msisdn] != self._numbers[msisdn])
+
+            for msisdn in removed | changed:
+                self._remove(msisdn)
+            for msisdn in added | changed:
+                self._add(numbers[msisdn])
+
+            self.refreshed_at = time.time()
+
+        return added, removed, changed
+
+    def start(self, interval=300):
+        """Refresh the index now, and then every `interval` seconds in a background thread until `stop` is called."""
+        self.refresh()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name='nexmo-number-index')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def buy_number(self, params=None, **kwargs):
+        """Buy a number with `Client.buy_number`, and add it to the index."""
+        params = params or kwargs
+        response = self.client.buy_number(params)
+        if _succeeded(response):
+            with self._lock:
+                self._add({'country': params.get('country'), 'msisdn': str(params['msisdn'])})
+        return response
+
+    def cancel_number(self, params=None, **kwargs):
+        """Cancel a number with `Client.cancel_number`, and remove it from the index."""
+        params = params or kwargs
+        response = self.client.cancel_number(params)
+        if _succeeded(response):
+            with self._lock:
+                self._remove(str(params['msisdn']))
+        return response
+
+    def update_number(self, params=None, **kwargs):
+        """Update a number with `Client.update_number`, and apply the new settings to the index."""
+        params = params or kwargs
+        response = self.client.update_number(params)
+        msisdn = str(params['msisdn'])
+        if _succeeded(response):
+            with self._lock:
+                number = dict(self._remove(msisdn) or {}, **params)
+                number['msisdn'] = msisdn
+                self._add(number)
+        return response
+
+    def __contains__(self, msisdn):
+        return str(msisdn) in self._numbers
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def _run(self, interval):
+        while not self._stopped.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("Failed to refresh the number index: %s", e)
+
+    def _add(self, number):
+        msisdn = number['msisdn']
+        self._numbers[msisdn] = number
+        for field, values in _indexed_values(number):
+            for value in values:
+                self._index[field].setdefault(value, set()).add(msisdn)
+
+    def _remove(self, msisdn):
+        number = self._numbers.pop(msisdn, None)
+        if number is None:
+            return None
+
+        for field, values in _indexed_values(number):
+            for value in values:
+                msisdns = self._index[field].get(value)
+                if msisdns is not None:
+                    msisdns.discard(msisdn)
+                    if not msisdns:
+                        del self._index[field][value]
+        return number
+
+
+def search_available_numbers(client, countries, patterns=(None,), features=(None,), quantity=None, rate=5,
+                             workers=8, params=None, buffer=1000):
+    """
+    Search for available numbers across every combination of country, pattern and features concurrently, yielding
+    each number as it is found.
+
+    Each combination is paged through with `get_available_numbers` in its own worker, and the page requests of all
+    the workers together are made no faster than `rate` per second. A number found by several combinations is only
+    yielded once. The search stops as soon as `quantity` numbers have been yielded or the caller stops iterating,
+    once any page requests in flight have finished::
+
+        for number in search_available_numbers(client, ['GB', 'FR'], patterns=['7700'], features=['SMS,VOICE'],
+                                               quantity=20):
+            client.buy_number(country=number['country'], msisdn=number['msisdn'])
+
+    :param client: The `nexmo.Client` to search with.
+    :param countries: The country codes to search in.
+    :param patterns: The number patterns to search for, or `None` for any number.
+    :param features: The features to require, each a comma-separated string such as 'SMS,VOICE', or `None` for any.
+    :param quantity: The number of numbers wanted, or `None` for every available number.
+    :param rate: The maximum number of page requests made per second.
+    :param workers: The number of combinations searched concurrently.
+    :param params: Any other params for `get_available_numbers`, such as `type` or `search_pattern`.
+    :param buffer: The maximum number of numbers found but not yet yielded. Once it is reached the workers wait for
+        the caller to catch up, so a slow caller doesn't cause every combination to be paged through into memory.
+    """
+    limiter = RateLimiter(rate)
+    results = queue.Queue(buffer)
+    stopped = threading.Event()
+    combinations = list(itertools.product(countries, patterns, features))
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def search(country, pattern, feature):
+        search_params = dict(params or {})
+        if pattern is not None:
+            search_params['pattern'] = pattern
+        if feature is not None:
+            search_params['features'] = feature
+
+        def fetch(page):
+            if not stopped.is_set():
+                limiter.acquire()
+            if stopped.is_set():
+                return {}
+            return client.get_available_numbers(country, page)
+
+        try:
+            for number in paginate(fetch, search_params, ['numbers'], 'index', 'size', first_index=1, prefetch=0):
+                if stopped.is_set():
+                    break
+                put((dict(number, country=number.get('country', country)), None))
+        except Exception as e:
+            put((None, e))
+        finally:
+            put(None)
+
+    executor = ThreadPoolExecutor(workers)
+    for combination in combinations:
+        executor.submit(search, *combination)
+
+    seen = set()
+    finished = 0
+    try:
+        while finished < len(combinations) and (quantity is None or len(seen) < quantity):
+            item = results.get()
+            if item is None:
+                finished += 1
+                continue
+
+            number, error = item
+            if error is not None:
+                raise error
+            if number['msisdn'] not in seen:
+                seen.add(number['msisdn'])
+                yield number
+    finally:
+        # Wait for any page requests in flight, so that none are made after the search has returned.
+        stopped.set()
+        executor.shutdown()
+
+
+def reconcile_numbers(client, desired, cancel_unlisted=False, dry_run=False, workers=8, index=None):
+    """
+    Bring the account's numbers into a desired state, making only the calls needed to get there.
+
+    The current state is fetched with `iter_account_numbers` (or read from `index`), and each number is compared
+    with its desired configuration: numbers that aren't rented are bought, numbers whose settings differ are updated
+    and numbers desired to be absent are cancelled. The calls for different numbers are made concurrently::
+
+        results = reconcile_numbers(client, {
+            '447700900000': {'country': 'GB', 'moHttpUrl': 'https://example.com/inbound'},
+            '447700900001': None,
+        })
+
+    :param client: The `nexmo.Client` to manage numbers with.
+    :param desired: A `dict` of the desired configuration of each number by msisdn: a `dict` of its `country` and
+        any settings from `NUMBER_SETTINGS`, or `None` for the number to be cancelled.
+    :param cancel_unlisted: `True` to also cancel every rented number missing from `desired`.
+    :param dry_run: `True` to work out the changes without making them.
+    :param workers: The number of numbers changed concurrently.
+    :param index: A `NumberIndex` to read the current state from, which is kept up to date with the changes made.
+    :return: A `list` of a `NumberResult` for each number, sorted by msisdn. `changes` is a `dict` of
+        `(current, desired)` values by setting, and `error` is the exception raised while changing the number, if any,
+        or a `ValueError` if a number to be bought has no `country`. Such numbers are left alone, even on a dry run.
+    """
+    if index is not None:
+        current = dict((number['msisdn'], number) for number in index.find())
+    else:
+        current = dict((str(number['msisdn']), number) for number in client.iter_account_numbers())
+
+    desired = dict((str(msisdn), config) for msisdn, config in desired.items())
+    if cancel_unlisted:
+        for msisdn in set(current) - set(desired):
+            desired[msisdn] = None
+
+    manager = index if index is not None else client
+    plans = [_plan_number(msisdn, current.get(msisdn), config) for msisdn, config in sorted(desired.items())]
+
+    if dry_run:
+        return [NumberResult(msisdn, action, changes, error) for msisdn, action, changes, _, error in plans]
+
+    def apply(plan):
+        msisdn, action, changes, params, error = plan
+        if error is not None:
+            return NumberResult(msisdn, action, changes, error)
+        try:
+            if action in (BUY, CANCEL):
+                _check((manager.buy_number if action == BUY else manager.cancel_number)(
+                    {'country': params['country'], 'msisdn': msisdn}))
+            if changes and action != CANCEL:
+                _check(manager.update_number(dict(params, msisdn=msisdn)))
+        except Exception as e:
+            return NumberResult(msisdn, action, changes, e)
+        return NumberResult(msisdn, action, changes, None)
+
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(apply, plans))
+
+
+def _plan_number(msisdn, number, config):
+    if config is None:
+        if number is None:
+            return msisdn, UNCHANGED, {}, None, None
+        return msisdn, CANCEL, {}, {'country': number.get('country')}, None
+
+    settings = dict((key, value) for key, value in config.items() if key in NUMBER_SETTINGS)
+    if number is None:
+        changes = dict((key, (None, value)) for key, value in settings.items())
+        if not config.get('country'):
+            return msisdn, BUY, changes, None, ValueError('A country is required to buy {0}'.format(msisdn))
+        return msisdn, BUY, changes, dict(settings, country=config['country']), None
+
+    # Unchanged settings are sent too, so that none are cleared by being left out of the update.
+    existing = dict((key, number[key]) for key in NUMBER_SETTINGS if number.get(key) is not None)
+    if _application_id(number) is not None:
+        existing['app_id'] = _application_id(number)
+
+    changes = dict((key, (existing.get(key), value)) for key, value in settings.items()
+                   if str(existing.get(key)) != str(value))
+    params = dict(existing, **settings)
+    params['country'] = config.get('country') or number.get('country')
+
+    return msisdn, UPDATE if changes else UNCHANGED, changes, params, None
+
+
+def _check(response):
+    if not _succeeded(response):
+        raise ClientError('{0} response: {1}'.format(response.get('error-code'), response.get('error-code-label')))
+
+
+def _indexed_values(number):
+    return [
+        ('country', _present(number.get('country'))),
+        ('feature', number.get('features') or []),
+        ('type', _present(number.get('type'))),
+        ('application_id', _present(_application_id(number))),
+    ]
+
+
+def _application_id(number):
+    if number.get('app_id'):
+        return number['app_id']
+    for prefix in ('voice', 'messages'):
+        if number.get(prefix + 'CallbackType') == 'app':
+            return number.get(prefix + 'CallbackValue')
+    return None
+
+
+def _present(value):
+    return [] if value is None else [value]
+
+
+def _succeeded(response):
+    return str(response.get('error-code', '200')) == '200'
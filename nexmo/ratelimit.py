@@ -0,0 +1,51 @@
+import threading
+import time
+
+
+class RateLimiter(object):
+    """
+    A thread-safe token bucket.
+
+    :param rate: The number of calls permitted per second.
+    :param burst: The number of calls that may be made back-to-back before throttling kicks in. Defaults to `rate`.
+    """
+
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError('rate must be greater than zero')
+
+        self.rate = float(rate)
+        self.burst = float(burst or max(rate, 1))
+        self._tokens = self.burst
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self):
+        """Return the number of seconds until a call would be permitted."""
+        with self._lock:
+            self._refill(time.time())
+            return max(0.0, (1 - self._tokens) / self.rate)
+
+    def try_acquire(self):
+        """Take a token if one is available, returning `True` on success."""
+        with self._lock:
+            self._refill(time.time())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                self._refill(time.time())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,280 @@
+"""
+A fixed-size, memory-mapped index from message id to send metadata, for matching delivery receipts to sent messages.
+
+The index is a single file holding an open-addressing hash table of fixed-size records, so it can be opened by every
+worker process of a prefork server and read or written by all of them, with lookups taking microseconds::
+
+    store = ReceiptStore('/var/run/myapp/receipts.idx', capacity=2000000, ttl=3 * 86400)
+
+    response = client.send_message({'from': 'Acme', 'to': to, 'text': text, 'client-ref': 'order-1234'})
+    store.record_response(response)
+
+    # Later, in whichever worker receives the delivery receipt:
+    sent = store.get(receipt['messageId'])
+"""
+from collections import namedtuple
+import errno
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from nexmo import Error
+
+SentMessage = namedtuple('SentMessage', ['message_id', 'client_ref', 'timestamp', 'parts', 'price'])
+
+_HEADER = struct.Struct('<4sII')
+_HEADER_SIZE = 16
+_MAGIC = b'NXRS'
+_VERSION = 1
+
+# state, message id, client ref, timestamp, parts, price
+_RECORD = struct.Struct('<B32s40sdHd')
+_TIMESTAMP = struct.Struct('<d')
+_TIMESTAMP_OFFSET = 73
+
+_EMPTY, _USED = 0, 1
+_EMPTY_RECORD = b'\0' * _RECORD.size
+
+
+class ReceiptStore(object):
+    """
+    :param path: The path of the index file. It is created if it doesn't exist.
+    :param capacity: The number of records the index can hold. Ignored when opening an existing index. Keep the
+        index well under capacity (ideally below 70% full) for fast lookups.
+    :param ttl: The number of seconds after which records expire and their slots can be reused.
+    """
+
+    def __init__(self, path, capacity=1000000, ttl=7 * 86400):
+        self.path = path
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._file = _open(path, capacity)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+        magic, version, self.capacity = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise Error('{0} is not a receipt store'.format(path))
+
+    def add(self, message_id, client_ref=None, timestamp=None, parts=1, price=0.0):
+        """Record the metadata of a sent message."""
+        key = _encode(message_id, 32)
+        record = _RECORD.pack(_USED, key, _encode(client_ref or '', 40), timestamp or time.time(), parts,
+                              float(price))
+
+        with self._locked(exclusive=True):
+            expired_before = time.time() - self.ttl
+            slot, empty, stale = self._probe(key, expired_before)
+
+            # Clear stale records out of the probe sequence, so that it doesn't grow with churn.
+            while stale is not None:
+                self._remove(stale)
+                slot, empty, stale = self._probe(key, expired_before)
+
+            if slot is None and empty is None:
+                self._purge(expired_before)
+                slot, empty, _ = self._probe(key, expired_before)
+            if slot is None:
+                slot = empty
+            if slot is None:
+                raise Error('Receipt store {0} is full'.format(self.path))
+
+            offset = self._offset(slot)
+            self._map[offset:offset + _RECORD.size] = record
+
+    def record_response(self, response, client_ref=None):
+        """Record every message part in a `send_message` response."""
+        messages = [message for message in response.get('messages') or [] if message.get('status') == '0']
+        for message in messages:
+            self.add(message['message-id'], message.get('client-ref', client_ref), parts=len(messages),
+                     price=message.get('message-price') or 0.0)
+
+    def get(self, message_id):
+        """
+        :return: The `SentMessage` recorded for `message_id`, or `None` if there isn't one or it has expired.
+        """
+        key = _encode(message_id, 32)
+
+        with self._locked(exclusive=False):
+            slot, _, _ = self._probe(key, time.time() - self.ttl)
+            if slot is None:
+                return None
+            _, message_id, client_ref, timestamp, parts, price = _RECORD.unpack_from(self._map, self._offset(slot))
+
+        return SentMessage(_decode(message_id), _decode(client_ref) or None, timestamp, parts, price)
+
+    def delete(self, message_id):
+        key = _encode(message_id, 32)
+
+        with self._locked(exclusive=True):
+            slot, _, _ = self._probe(key, time.time() - self.ttl)
+            if slot is not None:
+                self._remove(slot)
+
+    def pop(self, message_id):
+        """Return the `SentMessage` for `message_id` as `get` does, and remove it from the store."""
+        sent = self.get(message_id)
+        if sent is not None:
+            self.delete(message_id)
+        return sent
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _offset(self, slot):
+        return _HEADER_SIZE + slot * _RECORD.size
+
+    def _probe(self, key, expired_before):
+        """
+        Follow the probe sequence for `key` up to the first empty slot.
+
+        :return: A tuple of the slot of the live record for `key`, the empty slot ending the sequence and the first
+            expired slot in the sequence, each `None` if there isn't one.
+        """
+        slot = zlib.crc32(key) % self.capacity
+        stale = None
+
+        for _ in range(self.capacity):
+            offset = self._offset(slot)
+
+            if _state(self._map, offset) == _EMPTY:
+                return None, slot, stale
+
+            if _TIMESTAMP.unpack_from(self._map, offset + _TIMESTAMP_OFFSET)[0] >= expired_before:
+                if self._map[offset + 1:offset + 33] == key:
+                    return slot, None, stale
+            elif stale is None:
+                stale = slot
+
+            slot = (slot + 1) % self.capacity
+
+        return None, None, stale
+
+    def _remove(self, slot):
+        """
+        Empty a slot with backward-shift deletion: records later in the run that may be moved back towards their
+        home slot are, so that no tombstones are left to lengthen later probes.
+        """
+        hole = slot
+        current = slot
+
+        for _ in range(self.capacity - 1):
+            current = (current + 1) % self.capacity
+            offset = self._offset(current)
+            if _state(self._map, offset) == _EMPTY:
+                break
+
+            home = zlib.crc32(self._map[offset + 1:offset + 33]) % self.capacity
+            if hole <= current:
+                stays = hole < home <= current
+            else:
+                stays = home > hole or home <= current
+
+            if not stays:
+                hole_offset = self._offset(hole)
+                self._map[hole_offset:hole_offset + _RECORD.size] = self._map[offset:offset + _RECORD.size]
+                hole = current
+
+        offset = self._offset(hole)
+        self._map[offset:offset + _RECORD.size] = _EMPTY_RECORD
+
+    def _purge(self, expired_before):
+        """Remove every expired record."""
+        slot = 0
+        while slot < self.capacity:
+            offset = self._offset(slot)
+            if (_state(self._map, offset) == _USED and
+                    _TIMESTAMP.unpack_from(self._map, offset + _TIMESTAMP_OFFSET)[0] < expired_before):
+                # The removal may shift another record into this slot, so check it again.
+                self._remove(slot)
+            else:
+                slot += 1
+
+    def _locked(self, exclusive):
+        return _FileLock(self._lock, self._file, exclusive)
+
+
+class _FileLock(object):
+    def __init__(self, lock, file, exclusive):
+        self.lock = lock
+        self.file = file
+        self.exclusive = exclusive
+
+    def __enter__(self):
+        self.lock.acquire()
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        self.lock.release()
+
+
+def _open(path, capacity, timeout=10):
+    """
+    Open the index file, creating it if it doesn't exist. Exactly one process creates the file, holding an exclusive
+    lock while it is initialized; processes opening it meanwhile wait until it has been initialized.
+    """
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    else:
+        f = os.fdopen(fd, 'r+b')
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, capacity).ljust(_HEADER_SIZE, b'\0'))
+            f.truncate(_HEADER_SIZE + capacity * _RECORD.size)
+            f.flush()
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        return f
+
+    f = open(path, 'r+b')
+    deadline = time.time() + timeout
+
+    # The creating process may not have taken its lock yet, in which case the file is still empty.
+    while True:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+        try:
+            size = os.fstat(f.fileno()).st_size
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+        if size > _HEADER_SIZE:
+            return f
+        if time.time() >= deadline:
+            f.close()
+            raise Error('{0} is not a receipt store'.format(path))
+        time.sleep(0.01)
+
+
+def _state(buffer, offset):
+    state = buffer[offset]
+    return state if isinstance(state, int) else ord(state)
+
+
+def _encode(value, size):
+    value = value.encode('utf-8') if not isinstance(value, bytes) else value
+    if len(value) > size:
+        raise ValueError('{0!r} is longer than {1} bytes'.format(value, size))
+    return value.ljust(size, b'\0')
+
+
+def _decode(value):
+    return value.rstrip(b'\0').decode('utf-8')
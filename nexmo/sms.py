@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+import sys
+
+import requests
+
+from nexmo import logger
+
+if sys.version_info[0] == 3:
+    from urllib.parse import urlencode
+else:
+    from urllib import urlencode
+
+# The GSM 03.38 default alphabet, and the extension table characters that are sent as an escape plus a second septet.
+GSM_CHARACTERS = frozenset(
+    u'@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !"#¤%&\'()*+,-./0123456789:;<=>?'
+    u'¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà')
+GSM_EXTENDED_CHARACTERS = frozenset(u'^{}\\[~]|€\f')
+_GSM_ALL_CHARACTERS = GSM_CHARACTERS | GSM_EXTENDED_CHARACTERS
+
+# (single message capacity, per-segment capacity once split) in septets or UTF-16 code units.
+_CAPACITY = {
+    'text': (160, 153),
+    'unicode': (70, 67),
+}
+
+SegmentInfo = namedtuple('SegmentInfo', ['type', 'length', 'segments', 'boundaries'])
+
+
+class MessageTemplate(object):
+    """
+    A reusable SMS message whose constant params are form-encoded once, up front.
+
+    Sending from a template only encodes the per-recipient params, which avoids copying and re-encoding the
+    credentials and shared params (`from`, `type`, `callback`, `status-report-req`, ...) on every message::
+
+        template = MessageTemplate(client, {'from': 'Acme', 'type': 'unicode'})
+
+        for to, text in recipients:
+            template.send(to, text)
+
+    :param client: The `nexmo.Client` to send with.
+    :param params: A `dict` of params shared by every message sent from the template.
+    """
+
+    def __init__(self, client, params=None, **kwargs):
+        self.client = client
+        self.uri = 'https://' + client.host + '/sms/json'
+        self.headers = dict(client.headers, **{'Content-Type': 'application/x-www-form-urlencoded'})
+        self.body = _urlencode(dict(params or kwargs, api_key=client.api_key, api_secret=client.api_secret))
+
+    def send(self, to, text, **params):
+        """
+        Send the template to a single recipient.
+
+        :param to: The number to send the message to.
+        :param text: The body of the message.
+        :param params: Any additional per-message params, such as `client-ref`, which is used as an idempotency key
+            when the client has an `idempotency_store`, as with `Client.send_message`.
+        :return: The parsed response from the server.
+        """
+        params['to'] = to
+        params['text'] = text
+
+        body = self.body + '&' + _urlencode(params)
+
+        def send():
+            logger.debug("POST to %r with body %r", self.uri, body)
+            return self.client.parse(self.client.host, requests.post(self.uri, data=body, headers=self.headers))
+
+        return self.client._send_sms(params, send)
+
+
+def message_type(text):
+    """
+    Return the SMS API `type` needed to send `text`: 'text' if it fits the GSM 03.38 alphabet, otherwise 'unicode'.
+    """
+    return 'text' if _GSM_ALL_CHARACTERS.issuperset(text) else 'unicode'
+
+
+def segment(text):
+    """
+    Work out how `text` will be encoded and split into SMS segments, without making any API calls.
+
+    :param text: The body of the message.
+    :return: A `SegmentInfo` tuple of the message `type` ('text' or 'unicode'), its `length` in septets or UTF-16
+        code units, the number of `segments` it will be sent as, and the `(start, end)` index `boundaries` of each
+        segment within `text`.
+    """
+    encoding = message_type(text)
+    single, multi = _CAPACITY[encoding]
+
+    if encoding == 'text':
+        weights = None if GSM_EXTENDED_CHARACTERS.isdisjoint(text) else [
+            2 if char in GSM_EXTENDED_CHARACTERS else 1 for char in text]
+    else:
+        weights = None if not text or max(text) <= u'\uffff' else [2 if ord(char) > 0xFFFF else 1 for char in text]
+
+    length = len(text) if weights is None else sum(weights)
+
+    if length <= single:
+        return SegmentInfo(encoding, length, 1, [(0, len(text))])
+
+    if weights is None:
+        boundaries = [(start, min(start + multi, len(text))) for start in range(0, len(text), multi)]
+    else:
+        boundaries = []
+        start = used = 0
+        for index, weight in enumerate(weights):
+            # Escaped characters and surrogate pairs are never split across segments.
+            if used + weight > multi:
+                boundaries.append((start, index))
+                start, used = index, 0
+            used += weight
+        boundaries.append((start, len(text)))
+
+    return SegmentInfo(encoding, length, len(boundaries), boundaries)
+
+
+def segment_many(texts):
+    """
+    Segment each of an iterable of texts, yielding a `SegmentInfo` for each.
+    """
+    for text in texts:
+        yield segment(text)
+
+
+def _urlencode(params):
+    return urlencode([(key, _utf8(value)) for key, value in params.items() if value is not None])
+
+
+def _utf8(value):
+    if sys.version_info[0] == 2 and isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
@@ -0,0 +1,169 @@
+"""
+Incrementally parse the records out of a large JSON response, so that memory use doesn't grow with the response.
+"""
+import codecs
+import json
+from json.decoder import scanstring
+from numbers import Number
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRUCTURE = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+
+
+def iter_items(chunks, path):
+    """
+    Yield the elements of the JSON array found at `path`, parsing the document incrementally.
+
+    Only the element being parsed is held in memory; everything before and around the array is skipped over as it
+    streams past. If the path isn't present, nothing is yielded.
+
+    :param chunks: An iterable of `bytes` (UTF-8) or `str` chunks of the JSON document, such as
+        `response.iter_content(chunk_size)`.
+    :param path: The sequence of object keys leading to the array, such as `['_embedded', 'calls']`.
+    """
+    reader = _Reader(chunks)
+
+    for key in path:
+        if reader.peek() == 'n' and reader.read_value() is None:
+            return
+        reader.expect('{')
+        while True:
+            char = reader.peek()
+            if char == '}':
+                return
+            if char != '"':
+                raise ValueError('Expected \'"\' or "}" in JSON object, found {0!r}'.format(char))
+            name = reader.read_string()
+            reader.expect(':')
+            if name == key:
+                break
+            reader.skip_value()
+            char = reader.peek()
+            if char == ',':
+                reader.pos += 1
+            elif char != '}':
+                raise ValueError('Expected "," or "}" in JSON object, found {0!r}'.format(char))
+
+    if reader.peek() == 'n' and reader.read_value() is None:
+        return
+    reader.expect('[')
+
+    if reader.peek() == ']':
+        return
+
+    while True:
+        yield reader.read_value()
+
+        char = reader.peek()
+        reader.pos += 1
+        if char == ']':
+            return
+        if char != ',':
+            raise ValueError('Expected "," or "]" in JSON array, found {0!r}'.format(char))
+
+
+class _Reader(object):
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buf = ''
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    def fill(self):
+        """Read another chunk into the buffer, discarding what has been consumed. Returns `False` at the end."""
+        for chunk in self.chunks:
+            if isinstance(chunk, bytes):
+                chunk = self.utf8.decode(chunk)
+            if chunk:
+                self.buf = self.buf[self.pos:] + chunk
+                self.pos = 0
+                return True
+        return False
+
+    def peek(self):
+        """Skip whitespace and return the next character, or '' at the end of the document."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError('Expected {0!r} in JSON, found {1!r}'.format(char, found))
+        self.pos += 1
+
+    def read_string(self):
+        self.expect('"')
+        while True:
+            try:
+                value, self.pos = scanstring(self.buf, self.pos)
+                return value
+            except ValueError:
+                if not self.fill():
+                    raise
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if not self.fill():
+                    raise
+                continue
+
+            # A number at the end of the buffer may continue in the next chunk, including when the chunk ends
+            # just after its '.', 'e' or sign, where the decoder stops short of the end of the buffer.
+            if (isinstance(value, Number) and not isinstance(value, bool) and
+                    _NUMBER_TAIL.match(self.buf, end).end() == len(self.buf) and self.fill()):
+                continue
+
+            self.pos = end
+            return value
+
+    def skip_value(self):
+        char = self.peek()
+        if char == '"':
+            self.read_string()
+            return
+        if char not in ('{', '['):
+            self.read_value()
+            return
+
+        depth = 0
+        in_string = False
+
+        while True:
+            match = (_STRING_SPECIAL if in_string else _STRUCTURE).search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self.fill():
+                    raise ValueError('Unexpected end of JSON')
+                continue
+
+            char = match.group()
+            self.pos = match.end()
+
+            if in_string:
+                if char == '\\':
+                    while self.pos >= len(self.buf):
+                        if not self.fill():
+                            raise ValueError('Unexpected end of JSON')
+                    self.pos += 1
+                else:
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in '{[':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
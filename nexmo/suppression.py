@@ -0,0 +1,72 @@
+import threading
+import time
+
+from nexmo import e164
+
+
+class SuppressionList(object):
+    """
+    A local set of opted-out numbers, checked before sending event alert and marketing messages.
+
+    Numbers are stored normalized, so membership checks are a single hash lookup whatever format the recipient is
+    written in. Pass the list to `nexmo.Client` as `suppression_list` to have `send_event_alert_message` and
+    `send_marketing_message` raise `nexmo.SuppressedError` instead of making a request that will be rejected.
+
+    :param numbers: An optional iterable of numbers to suppress initially.
+    """
+
+    def __init__(self, numbers=()):
+        self._numbers = set(_normalize(number) for number in numbers)
+        self._lock = threading.Lock()
+        self.last_synced = None
+
+    def add(self, number):
+        with self._lock:
+            self._numbers.add(_normalize(number))
+
+    def discard(self, number):
+        with self._lock:
+            self._numbers.discard(_normalize(number))
+
+    def filter(self, numbers):
+        """Yield each of `numbers` that is not suppressed."""
+        for number in numbers:
+            if _normalize(number) not in self._numbers:
+                yield number
+
+    def sync(self, client):
+        """
+        Bring the list up to date with the opt-outs returned by `client.get_event_alert_numbers()`.
+
+        Only the differences are applied, so numbers added locally with `add` since the last sync are kept unless the
+        server reports them as opted back in.
+
+        :return: A tuple of the sets of numbers that were added and removed.
+        """
+        opted_in, opted_out = set(), set()
+
+        for entry in client.get_event_alert_numbers().get('opt-in-list') or []:
+            number = _normalize(entry['msisdn'])
+            if str(entry.get('opt-out')).lower() == 'true':
+                opted_out.add(number)
+            else:
+                opted_in.add(number)
+
+        with self._lock:
+            added = opted_out - self._numbers
+            removed = opted_in & self._numbers
+            self._numbers |= added
+            self._numbers -= removed
+            self.last_synced = time.time()
+
+        return added, removed
+
+    def __contains__(self, number):
+        return _normalize(number) in self._numbers
+
+    def __len__(self):
+        return len(self._numbers)
+
+
+def _normalize(number):
+    return e164.normalize(str(number)) or str(number)
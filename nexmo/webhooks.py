@@ -0,0 +1,140 @@
+"""
+Receive Nexmo webhooks: inbound messages, delivery receipts and call events.
+
+`wsgi_app` builds a WSGI application (and `nexmo.asgi.asgi_app` an ASGI one, on Python 3.5+) that parses each callback,
+checks its signature with the client's `signature_secret` and `signature_method`, and hands it on as a `WebhookEvent`
+either to a callback or to a bounded queue. When the queue is full the app answers 503 straight away so that Nexmo
+retries the callback later, rather than holding the connection open::
+
+    events = queue.Queue(maxsize=10000)
+    application = wsgi_app(client, queue=events)
+"""
+from collections import namedtuple
+import json
+import sys
+
+if sys.version_info[0] == 3:
+    from urllib.parse import parse_qsl
+    import queue as _queue
+else:
+    from urlparse import parse_qsl
+    import Queue as _queue
+
+INBOUND_MESSAGE = 'inbound-message'
+DELIVERY_RECEIPT = 'delivery-receipt'
+CALL_EVENT = 'call-event'
+UNKNOWN = 'unknown'
+
+# The event types Nexmo leaves unsigned. Every other callback, including one that can't be classified, must be signed.
+UNSIGNED_EVENT_TYPES = (CALL_EVENT,)
+
+WebhookEvent = namedtuple('WebhookEvent', ['type', 'params'])
+
+_STATUS_LINES = {
+    200: '200 OK',
+    400: '400 Bad Request',
+    403: '403 Forbidden',
+    503: '503 Service Unavailable',
+}
+
+
+def event_type(params):
+    """Classify the params of a callback as an inbound message, delivery receipt or call event."""
+    if 'uuid' in params and 'conversation_uuid' in params:
+        return CALL_EVENT
+    if 'messageId' in params and 'status' in params and ('scts' in params or 'err-code' in params):
+        return DELIVERY_RECEIPT
+    if 'msisdn' in params and ('text' in params or 'type' in params):
+        return INBOUND_MESSAGE
+    return UNKNOWN
+
+
+class WebhookHandler(object):
+    """
+    The framework-independent part of the webhook apps: parses a callback and dispatches it.
+
+    :param client: The `nexmo.Client` whose `signature_secret` is used to check signatures. Signatures are only
+        checked when the client has a signature secret.
+    :param callback: A callable called with each `WebhookEvent`. It is called before the callback is acknowledged,
+        so it should return quickly.
+    :param queue: A bounded queue that each `WebhookEvent` is put on without blocking.
+    :param unsigned_types: The event types accepted without a signature. Defaults to `UNSIGNED_EVENT_TYPES`. A
+        callback that carries a `sig` is always checked.
+    """
+
+    def __init__(self, client=None, callback=None, queue=None, unsigned_types=UNSIGNED_EVENT_TYPES):
+        if callback is None and queue is None:
+            raise ValueError('A callback or a queue is required')
+
+        self.client = client
+        self.callback = callback
+        self.queue = queue
+        self.unsigned_types = frozenset(unsigned_types)
+
+    def handle(self, method, query_string, content_type, body):
+        """
+        Handle a callback request.
+
+        :return: The HTTP status code to respond with.
+        """
+        try:
+            params = self.parse(method, query_string, content_type, body)
+        except ValueError:
+            return 400
+
+        event = WebhookEvent(event_type(params), params)
+
+        if self.client is not None and self.client.signature_secret:
+            signed = event.type not in self.unsigned_types or 'sig' in params
+            if signed and not self.client.check_signature(params):
+                return 403
+
+        if self.queue is not None:
+            try:
+                self.queue.put_nowait(event)
+            except _queue.Full:
+                return 503
+
+        if self.callback is not None:
+            self.callback(event)
+
+        return 200
+
+    def parse(self, method, query_string, content_type, body):
+        if method == 'GET':
+            return dict(parse_qsl(query_string, keep_blank_values=True))
+
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+
+        if content_type.startswith('application/json'):
+            params = json.loads(body)
+            if not isinstance(params, dict):
+                raise ValueError('Expected a JSON object')
+            return params
+
+        return dict(parse_qsl(body, keep_blank_values=True))
+
+
+def wsgi_app(client=None, callback=None, queue=None, unsigned_types=UNSIGNED_EVENT_TYPES):
+    """
+    Build a WSGI application that receives webhooks. The arguments are the same as for `WebhookHandler`.
+    """
+    handler = WebhookHandler(client, callback, queue, unsigned_types)
+
+    def application(environ, start_response):
+        method = environ.get('REQUEST_METHOD', 'GET')
+        body = b''
+
+        if method != 'GET':
+            try:
+                length = int(environ.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                length = 0
+            body = environ['wsgi.input'].read(length) if length else b''
+
+        status = handler.handle(method, environ.get('QUERY_STRING', ''), environ.get('CONTENT_TYPE', ''), body)
+        start_response(_STATUS_LINES[status], [('Content-Type', 'text/plain'), ('Content-Length', '0')])
+        return [b'']
+
+    return application
@@ -1,6 +1,18 @@
 import re
+import sys
 
 from setuptools import setup
+from setuptools.command.build_py import build_py
+
+
+class BuildPy(build_py):
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+        if sys.version_info < (3, 5):
+            # nexmo.asgi uses async def, which can't be compiled before Python 3.5.
+            modules = [module for module in modules if module[:2] != ('nexmo', 'asgi')]
+        return modules
+
 
 setup(name='nexmo',
       version='2.1.0',
@@ -11,11 +23,13 @@ setup(name='nexmo',
       author_email='mail@timcraft.com',
       license='MIT',
       packages=['nexmo'],
+      cmdclass={'build_py': BuildPy},
       platforms=['any'],
       install_requires=[
           'requests',
           'PyJWT[crypto]',
           'pytz',
+          'futures; python_version < "3.2"',
       ],
       tests_require=['cryptography'],
       classifiers=[
@@ -1,6 +1,10 @@
+import json
 import platform
+import threading
+import time
 
 import nexmo
+from nexmo.account import BalanceTracker, Price, PricingIndex
 from util import *
 
 
@@ -92,3 +96,151 @@ def test_get_account_numbers(client, dummy_data):
     assert isinstance(client.get_account_numbers(size=25), dict)
     assert request_user_agent() == dummy_data.user_agent
     assert 'size=25' in request_query()
+
+
+def stub_balance(value):
+    responses.add(responses.GET, 'https://rest.nexmo.com/account/get-balance', status=200,
+                  content_type='application/json', body='{"value": %s, "autoReload": false}' % value)
+
+
+def stub_send(*balances):
+    messages = ','.join('{"status": "0", "remaining-balance": "%s", "message-price": "0.03330000"}' % balance
+                        for balance in balances)
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', status=200, content_type='application/json',
+                  body='{"message-count": "%d", "messages": [%s]}' % (len(balances), messages))
+
+
+@responses.activate
+def test_balance_tracker_updates_from_send_responses(dummy_data):
+    stub_balance(20)
+    stub_send('19.93340000', '19.90010000')
+
+    tracker = BalanceTracker()
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, balance_tracker=tracker)
+
+    assert tracker.balance == 20
+    client.send_message({'from': 'Python', 'to': '447525856424', 'text': 'Hey!'})
+    assert tracker.balance == 19.9001
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_balance_tracker_reconciles_when_stale(client):
+    stub_balance(20)
+    stub_balance(15)
+
+    tracker = BalanceTracker(client, reconcile_interval=0)
+
+    assert tracker.balance == 20
+    assert tracker.balance == 15
+
+
+def test_balance_tracker_thresholds():
+    calls = []
+
+    tracker = BalanceTracker()
+    tracker.add_threshold(10, calls.append)
+
+    tracker.update({'messages': [{'remaining-balance': '10.5'}]})
+    tracker.update({'messages': [{'remaining-balance': '9.5'}]})
+    tracker.update({'messages': [{'remaining-balance': '9.0'}]})
+    assert calls == [9.5]
+
+    tracker.update({'messages': [{'remaining-balance': '12'}]})
+    tracker.update({'messages': [{'remaining-balance': '8'}]})
+    assert calls == [9.5, 8.0]
+
+
+GB_PRICING = {'country': 'GB', 'name': 'United Kingdom', 'prefix': '44', 'mt': '0.03330000', 'networks': [
+    {'code': '23410', 'network': 'Telefonica UK', 'mtPrice': '0.03000000', 'ranges': [4477009, 447701]},
+]}
+
+NANP_PRICING = {'count': 2, 'prices': [
+    {'countryCode': 'US', 'dialingPrefix': '1', 'defaultPrice': '0.00570000', 'currency': 'EUR', 'networks': []},
+    {'countryCode': 'CA', 'dialingPrefix': '1', 'defaultPrice': '0.00570000', 'currency': 'EUR', 'networks': []},
+]}
+
+
+@responses.activate
+def test_get_country_pricing_by_type(client):
+    stub(responses.GET, 'https://rest.nexmo.com/account/get-pricing/outbound/voice')
+
+    assert isinstance(client.get_country_pricing('GB', 'voice'), dict)
+    assert 'country=GB' in request_query()
+
+
+@responses.activate
+def test_pricing_index(client):
+    responses.add(responses.GET, 'https://rest.nexmo.com/account/get-pricing/outbound', body=json.dumps(GB_PRICING),
+                  status=200, content_type='application/json')
+    responses.add(responses.GET, 'https://rest.nexmo.com/account/get-prefix-pricing/outbound',
+                  body=json.dumps(NANP_PRICING), status=200, content_type='application/json')
+
+    index = PricingIndex(client, countries=['GB'], prefixes=['1'])
+
+    assert index.estimate('+44 7700 900001') == Price(0.03, None, 'GB', 'Telefonica UK')
+    assert index.estimate('447900900001') == Price(0.0333, None, 'GB', None)
+    assert [price and price.price for price in index.estimate_many(['14155550100', '33612345678', 'invalid'])] == [
+        0.0057, None, None]
+
+    total, unpriced = index.cost(['447700900001', '447900900001', '33612345678'], units=2)
+    assert round(total, 4) == 0.1266
+    assert unpriced == ['33612345678']
+
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_pricing_index_refresh(client):
+    responses.add(responses.GET, 'https://rest.nexmo.com/account/get-pricing/outbound', body=json.dumps(GB_PRICING),
+                  status=200, content_type='application/json')
+
+    index = PricingIndex(client, countries=['GB'], refresh_interval=0)
+    index.estimate('447700900001')
+    index.estimate('447700900001')
+    assert len(responses.calls) == 2
+
+    index = PricingIndex(client, refresh_interval=None)
+    index.load([GB_PRICING])
+    assert index.estimate('447700900001').price == 0.03
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_pricing_index_keeps_loaded_pricing(client):
+    responses.add(responses.GET, 'https://rest.nexmo.com/account/get-prefix-pricing/outbound',
+                  body=json.dumps(NANP_PRICING), status=200, content_type='application/json')
+
+    index = PricingIndex(client, refresh_interval=0)
+    index.load([GB_PRICING])
+    assert index.estimate('447700900001').price == 0.03
+    assert len(responses.calls) == 0
+
+    index = PricingIndex(client, prefixes=['1'], refresh_interval=0)
+    index.load([GB_PRICING])
+    assert index.estimate('447700900001').price == 0.03
+    assert index.estimate('14155550100').price == 0.0057
+    assert len(responses.calls) == 2
+
+
+def test_pricing_index_syncs_once_when_stale():
+    calls = []
+    started = threading.Event()
+
+    class SlowClient(object):
+        def get_country_pricing(self, country, type=None):
+            calls.append(country)
+            started.wait(1)
+            return GB_PRICING
+
+    index = PricingIndex(SlowClient(), countries=['GB'], refresh_interval=3600)
+    threads = [threading.Thread(target=index.estimate, args=('447700900001',)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    started.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ['GB']
+    assert index.estimate('447700900001').price == 0.03
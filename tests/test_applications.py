@@ -1,3 +1,6 @@
+import json
+
+from nexmo.applications import CREATE, DELETE, UNCHANGED, UPDATE, sync_applications
 from util import *
 
 
@@ -47,3 +50,65 @@ def test_delete_application(client, dummy_data):
 
     assert None == client.delete_application('xx-xx-xx-xx')
     assert request_user_agent() == dummy_data.user_agent
+
+
+APPLICATIONS = {'count': 2, 'page_size': 100, 'page_index': 0, '_embedded': {'applications': [
+    {'id': 'app-1', 'name': 'Support', 'voice': {'webhooks': [
+        {'endpoint_type': 'answer_url', 'endpoint': 'https://example.com/answer', 'http_method': 'GET'},
+        {'endpoint_type': 'event_url', 'endpoint': 'https://example.com/event', 'http_method': 'POST'},
+    ]}},
+    {'id': 'app-2', 'name': 'Sales', 'voice': {'webhooks': [
+        {'endpoint_type': 'answer_url', 'endpoint': 'https://example.com/sales', 'http_method': 'GET'},
+        {'endpoint_type': 'event_url', 'endpoint': 'https://example.com/event', 'http_method': 'POST'},
+    ]}},
+]}}
+
+SPEC = {
+    'Support': {'type': 'voice', 'answer_url': 'https://example.com/answer', 'event_url': 'https://example.com/event'},
+    'Sales': {'type': 'voice', 'answer_url': 'https://example.com/sales/v2', 'event_url': 'https://example.com/event'},
+    'Billing': {'type': 'voice', 'answer_url': 'https://example.com/billing',
+                'event_url': 'https://example.com/event'},
+}
+
+
+def stub_applications():
+    responses.add(responses.GET, 'https://api.nexmo.com/v1/applications', body=json.dumps(APPLICATIONS), status=200,
+                  content_type='application/json')
+
+
+@responses.activate
+def test_sync_applications_dry_run(client):
+    stub_applications()
+
+    results = sync_applications(client, SPEC, delete_unlisted=True, dry_run=True)
+
+    assert [(result.name, result.action, result.id) for result in results] == [
+        ('Billing', CREATE, None),
+        ('Sales', UPDATE, 'app-2'),
+        ('Support', UNCHANGED, 'app-1'),
+    ]
+    assert results[1].changes == {'answer_url': ('https://example.com/sales', 'https://example.com/sales/v2')}
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_sync_applications(client):
+    stub_applications()
+    responses.add(responses.POST, 'https://api.nexmo.com/v1/applications', body='{"id": "app-3"}', status=201,
+                  content_type='application/json')
+    stub(responses.PUT, 'https://api.nexmo.com/v1/applications/app-2')
+    responses.add(responses.DELETE, 'https://api.nexmo.com/v1/applications/app-1', status=204)
+
+    results = sync_applications(client, {'Sales': SPEC['Sales'], 'Billing': SPEC['Billing']}, delete_unlisted=True)
+
+    assert [(result.name, result.action, result.id, result.error) for result in results] == [
+        ('Billing', CREATE, 'app-3', None),
+        ('Sales', UPDATE, 'app-2', None),
+        ('Support', DELETE, 'app-1', None),
+    ]
+
+    update = [call.request for call in responses.calls if call.request.method == 'PUT'][0]
+    body = json.loads(update.body.decode('utf-8'))
+    assert body['answer_url'] == 'https://example.com/sales/v2'
+    assert body['answer_method'] == 'GET'
+    assert body['name'] == 'Sales'
@@ -0,0 +1,58 @@
+import csv
+import json
+import os.path
+
+import nexmo
+from nexmo import audit
+
+
+def signed_payloads(count):
+    client = nexmo.Client(signature_secret='secret', signature_method='sha256')
+
+    for index in range(count):
+        payload = {'messageId': 'message-{0}'.format(index), 'status': 'delivered', 'timestamp': '1461605396'}
+        payload['sig'] = client.signature(dict(payload))
+        if index % 3 == 0:
+            payload['status'] = 'failed'
+        yield payload
+
+
+def test_check_signatures_in_process():
+    results = list(audit.check_signatures(signed_payloads(10), 'secret', 'sha256', processes=1, chunksize=3))
+    assert results == [index % 3 != 0 for index in range(10)]
+
+
+def test_check_signatures_in_process_pool():
+    results = list(audit.check_signatures(signed_payloads(50), 'secret', 'sha256', processes=2, chunksize=4))
+    assert results == [index % 3 != 0 for index in range(50)]
+
+
+def test_verify_jsonl_archive(tmpdir):
+    archive = os.path.join(str(tmpdir), 'archive.jsonl')
+    output = os.path.join(str(tmpdir), 'results.csv')
+
+    with open(archive, 'w') as f:
+        for payload in signed_payloads(4):
+            f.write(json.dumps(payload) + '\n')
+
+    assert audit.verify_archive(archive, output, 'secret', 'sha256', processes=1) == (2, 2)
+
+    with open(output) as f:
+        rows = list(csv.reader(f))
+
+    assert rows[0] == ['record', 'message_id', 'result']
+    assert rows[1] == ['1', 'message-0', 'fail']
+    assert rows[2] == ['2', 'message-1', 'pass']
+
+
+def test_verify_csv_archive(tmpdir):
+    archive = os.path.join(str(tmpdir), 'archive.csv')
+    output = os.path.join(str(tmpdir), 'results.csv')
+
+    with open(archive, 'w') as f:
+        writer = csv.DictWriter(f, ['messageId', 'status', 'timestamp', 'sig'])
+        writer.writeheader()
+        for payload in signed_payloads(3):
+            writer.writerow(payload)
+
+    assert audit.main([archive, output, '--secret', 'secret', '--method', 'sha256', '--processes', '1']) == 1
@@ -0,0 +1,88 @@
+import json
+import threading
+
+try:
+    from urllib.parse import parse_qs
+except ImportError:
+    from urlparse import parse_qs
+
+import nexmo
+from nexmo.batching import Batcher, MessageLookupBatcher, VerificationLookupBatcher
+from util import *
+
+
+def search_callback(request):
+    ids = parse_qs(urlparse(request.url).query)['ids']
+    items = [{'message-id': message_id, 'to': '447525856424'} for message_id in ids if message_id != 'missing']
+    return 200, {}, json.dumps({'count': len(items), 'items': items})
+
+
+def test_batcher_merges_concurrent_requests():
+    batches = []
+
+    def fetch(keys):
+        batches.append(sorted(keys))
+        return dict((key, key * 2) for key in keys)
+
+    batcher = Batcher(fetch, max_batch=3, window=0.2)
+    futures = [batcher.submit(key) for key in [1, 2, 2, 3, 4]]
+
+    assert [future.result(5) for future in futures] == [2, 4, 4, 6, 8]
+    batcher.close()
+
+    assert batches == [[1, 2, 3], [4]]
+
+
+def test_batcher_propagates_errors():
+    def fetch(keys):
+        raise nexmo.ServerError('500 response from rest.nexmo.com')
+
+    batcher = Batcher(fetch, max_batch=10)
+
+    with pytest.raises(nexmo.ServerError):
+        batcher.get('key', timeout=5)
+
+    batcher.close()
+
+
+@responses.activate
+def test_message_lookup_batcher(client):
+    responses.add_callback(responses.GET, 'https://rest.nexmo.com/search/messages', callback=search_callback,
+                           content_type='application/json')
+
+    lookups = MessageLookupBatcher(client, window=0.2)
+    results = {}
+
+    def lookup(message_id):
+        results[message_id] = lookups.get_message(message_id)
+
+    threads = [threading.Thread(target=lookup, args=(message_id,)) for message_id in ['a', 'b', 'c', 'missing']]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    lookups.close()
+
+    assert len(responses.calls) == 1
+    assert results['a'] == {'message-id': 'a', 'to': '447525856424'}
+    assert results['missing'] is None
+
+
+@responses.activate
+def test_verification_lookup_batcher(client):
+    def callback(request):
+        request_ids = parse_qs(urlparse(request.url).query)['request_ids']
+        found = [{'request_id': request_id, 'status': 'SUCCESS'} for request_id in request_ids]
+        return 200, {}, json.dumps({'verification_requests': found})
+
+    responses.add_callback(responses.GET, 'https://api.nexmo.com/verify/search/json', callback=callback,
+                           content_type='application/json')
+
+    lookups = VerificationLookupBatcher(client, window=0.2)
+    futures = [lookups.submit(request_id) for request_id in ['a', 'b', 'c']]
+
+    assert [future.result(5)['request_id'] for future in futures] == ['a', 'b', 'c']
+    lookups.close()
+
+    assert len(responses.calls) == 1
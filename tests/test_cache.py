@@ -0,0 +1,77 @@
+import os.path
+
+from nexmo.cache import MemoryCache, SQLiteCache
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+    assert len(cache) == 2
+
+
+def test_memory_cache_default():
+    cache = MemoryCache()
+    assert cache.get('missing') is None
+    assert cache.get('missing', 'default') == 'default'
+
+
+def test_sqlite_cache_persists(tmpdir):
+    path = os.path.join(str(tmpdir), 'cache.db')
+
+    cache = SQLiteCache(path)
+    cache.set('a', {'key': 'value'})
+    cache.close()
+
+    cache = SQLiteCache(path)
+    assert cache.get('a') == {'key': 'value'}
+    cache.delete('a')
+    assert 'a' not in cache
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmpdir):
+    cache = SQLiteCache(os.path.join(str(tmpdir), 'cache.db'), maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert len(cache) == 2
+    assert 'b' not in cache
+
+
+def test_memory_cache_ttl():
+    cache = MemoryCache()
+    cache.set('a', 1, ttl=60)
+    cache.set('b', 2, ttl=-1)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert 'b' not in cache
+
+
+def test_sqlite_cache_ttl(tmpdir):
+    cache = SQLiteCache(os.path.join(str(tmpdir), 'cache.db'))
+    cache.set('a', 1, ttl=60)
+    cache.set('b', 2, ttl=-1)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert 'b' not in cache
+
+
+def test_add_only_sets_missing_entries(tmpdir):
+    for cache in (MemoryCache(), SQLiteCache(os.path.join(str(tmpdir), 'cache.db'))):
+        assert cache.add('a', 1)
+        assert not cache.add('a', 2)
+        assert cache.get('a') == 1
+
+        cache.set('b', 1, ttl=-1)
+        assert cache.add('b', 2)
+        assert cache.get('b') == 2
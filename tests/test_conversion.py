@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import nexmo
+from nexmo.conversion import ConversionReporter
+from util import *
+
+
+@responses.activate
+def test_conversions_are_submitted_in_the_background(client):
+    responses.add(responses.POST, 'https://api.nexmo.com/conversions/sms', status=200, body=b'OK')
+
+    reporter = ConversionReporter(client)
+    assert reporter.report('message-1')
+    assert reporter.report('message-2', delivered=False)
+    reporter.close()
+
+    bodies = sorted(call.request.body for call in responses.calls)
+    assert len(bodies) == 2
+    assert 'message-id=message-1' in bodies[0]
+    assert 'message-id=message-2' in bodies[1]
+    assert 'delivered=False' in bodies[1]
+
+
+@responses.activate
+def test_failed_conversions_are_retried(client):
+    responses.add(responses.POST, 'https://api.nexmo.com/conversions/sms', status=500)
+    responses.add(responses.POST, 'https://api.nexmo.com/conversions/sms', status=200, body=b'OK')
+
+    reporter = ConversionReporter(client, workers=1, backoff=0)
+    reporter.report('message-1')
+    reporter.close()
+
+    assert len(responses.calls) == 2
+
+
+def test_report_after_close(client):
+    reporter = ConversionReporter(client)
+    reporter.close()
+
+    with pytest.raises(nexmo.Error):
+        reporter.report('message-1')
+
+
+def test_close_honours_its_timeout_when_the_queue_is_full():
+    started = threading.Event()
+    release = threading.Event()
+
+    class SlowClient(object):
+        def submit_sms_conversion(self, message_id, delivered, timestamp):
+            started.set()
+            release.wait(5)
+
+    reporter = ConversionReporter(SlowClient(), maxsize=1, workers=1)
+    reporter.report('message-1')
+    started.wait(5)
+    assert reporter.report('message-2')
+    assert not reporter.report('message-3')
+
+    began = time.time()
+    reporter.close(timeout=0.2)
+    assert time.time() - began < 2
+
+    release.set()
+
+
+def test_queued_conversions_are_flushed_at_exit():
+    script = '\n'.join([
+        'import time',
+        'from nexmo.conversion import ConversionReporter',
+        'class Client(object):',
+        '    def submit_sms_conversion(self, message_id, delivered, timestamp):',
+        '        time.sleep(0.2)',
+        '        print(message_id)',
+        'reporter = ConversionReporter(Client(), workers=1)',
+        'reporter.report("message-1")',
+        'reporter.report("message-2")',
+    ])
+
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=os.path.dirname(os.path.dirname(__file__)))
+
+    assert output.split() == [b'message-1', b'message-2']
@@ -0,0 +1,46 @@
+from nexmo import e164
+
+
+def test_normalize_international_numbers():
+    assert e164.normalize('+44 7525 856424') == '447525856424'
+    assert e164.normalize('0044 (7525) 856-424') == '447525856424'
+    assert e164.normalize('14843331234') == '14843331234'
+
+
+def test_normalize_national_numbers():
+    assert e164.normalize('07525 856424', '44') == '447525856424'
+    assert e164.normalize('(484) 333-1234', '1') == '14843331234'
+    assert e164.normalize('1 484 333 1234', '1') == '14843331234'
+    assert e164.normalize('06 1234 5678', '39') == '390612345678'
+
+
+def test_normalize_rejects_invalid_numbers():
+    assert e164.normalize('') is None
+    assert e164.normalize('not a number') is None
+    assert e164.normalize('+44 7525') is None
+    assert e164.normalize('+1 484 333 12345') is None
+    assert e164.normalize('+1234567890123456') is None
+    assert e164.normalize('+2591234567') is None
+
+
+def test_country_code():
+    assert e164.country_code('447525856424') == '44'
+    assert e164.country_code('14843331234') == '1'
+    assert e164.country_code('353861234567') == '353'
+    assert e164.country_code('2591234567') is None
+
+
+def test_is_valid():
+    assert e164.is_valid('+447525856424')
+    assert not e164.is_valid('+4475')
+
+
+def test_normalize_many():
+    numbers = ['+447525856424', 'bad', '07525 856424']
+
+    assert list(e164.normalize_many(numbers, '44')) == [
+        ('+447525856424', '447525856424'),
+        ('bad', None),
+        ('07525 856424', '447525856424'),
+    ]
+    assert list(e164.valid_numbers(numbers, '44')) == ['447525856424', '447525856424']
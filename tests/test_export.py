@@ -0,0 +1,98 @@
+from datetime import date, datetime, timedelta
+import json
+import os.path
+
+try:
+    from urllib.parse import parse_qs
+except ImportError:
+    from urlparse import parse_qs
+
+from nexmo.export import CSVSink, JSONLinesSink, export_calls, export_messages
+from util import *
+
+START = datetime(2018, 1, 1)
+
+# Two calls a day for a week, except for a burst of 30 calls on the third day.
+CALL_TIMES = sorted([START + timedelta(days=day, hours=hour) for day in range(7) for hour in (1, 13)] +
+                    [START + timedelta(days=2, minutes=minute) for minute in range(30)])
+
+
+def calls_callback(request):
+    params = dict((key, values[0]) for key, values in parse_qs(urlparse(request.url).query).items())
+    start = datetime.strptime(params['date_start'], '%Y-%m-%dT%H:%M:%SZ')
+    end = datetime.strptime(params['date_end'], '%Y-%m-%dT%H:%M:%SZ')
+    index, size = int(params['record_index']), int(params['page_size'])
+
+    calls = [{'uuid': time.isoformat(), 'status': 'completed'} for time in CALL_TIMES if start <= time < end]
+    return 200, {}, json.dumps({'count': len(calls), 'page_size': size, 'record_index': index,
+                                '_embedded': {'calls': calls[index:index + size]}})
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+@responses.activate
+def test_export_calls_splits_dense_windows(client, tmpdir):
+    responses.add_callback(responses.GET, 'https://api.nexmo.com/v1/calls', callback=calls_callback,
+                           content_type='application/json')
+
+    path = os.path.join(str(tmpdir), 'calls.jsonl')
+    sink = JSONLinesSink(path)
+
+    count = export_calls(client, START, START + timedelta(days=7), sink, max_window_records=10, workers=3)
+    sink.close()
+
+    uuids = sorted(call['uuid'] for call in read_jsonl(path))
+    assert count == len(CALL_TIMES)
+    assert uuids == [time.isoformat() for time in CALL_TIMES]
+
+    dense_requests = [call for call in responses.calls if 'date_start=2018-01-03' in call.request.url]
+    assert len(dense_requests) > 1
+
+
+@responses.activate
+def test_export_calls_resumes_from_checkpoint(client, tmpdir):
+    responses.add_callback(responses.GET, 'https://api.nexmo.com/v1/calls', callback=calls_callback,
+                           content_type='application/json')
+
+    path = os.path.join(str(tmpdir), 'calls.jsonl')
+    checkpoint = os.path.join(str(tmpdir), 'calls.checkpoint')
+
+    sink = JSONLinesSink(path)
+    export_calls(client, START, START + timedelta(days=2), sink, checkpoint=checkpoint)
+    sink.close()
+    requests_made = len(responses.calls)
+
+    sink = JSONLinesSink(path)
+    count = export_calls(client, START, START + timedelta(days=3), sink, checkpoint=checkpoint)
+    sink.close()
+
+    assert len(responses.calls) == requests_made + 1
+    assert count == 32
+    assert len(read_jsonl(path)) == 36
+
+
+@responses.activate
+def test_export_messages_to_csv(client, tmpdir):
+    def callback(request):
+        params = dict((key, values[0]) for key, values in parse_qs(urlparse(request.url).query).items())
+        items = [{'message-id': params['to'] + params['date'], 'to': params['to'], 'body': {'nested': True}}]
+        return 200, {}, json.dumps({'count': 1, 'items': items})
+
+    responses.add_callback(responses.GET, 'https://rest.nexmo.com/search/messages', callback=callback,
+                           content_type='application/json')
+
+    path = os.path.join(str(tmpdir), 'messages.csv')
+    sink = CSVSink(path)
+
+    assert export_messages(client, ['447700900000', '447700900001'], date(2018, 1, 1), date(2018, 1, 3), sink) == 6
+    sink.close()
+
+    with open(path) as f:
+        lines = f.read().splitlines()
+
+    assert lines[0] == 'body,message-id,to'
+    assert len(lines) == 7
+    assert '"{""nested"": true}"' in lines[1]
@@ -0,0 +1,122 @@
+import nexmo
+from nexmo.cache import SQLiteCache
+from nexmo.httpcache import HTTPCache, cache_key
+from util import *
+
+APPLICATIONS_URL = 'https://api.nexmo.com/v1/applications/xx-xx-xx-xx'
+
+
+def cached_client(dummy_data, cache):
+    return nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, http_cache=cache)
+
+
+def stub_application(headers, status=200, body='{"id": "xx-xx-xx-xx"}'):
+    responses.add(responses.GET, APPLICATIONS_URL, body=body, status=status, content_type='application/json',
+                  adding_headers=headers)
+
+
+@responses.activate
+def test_fresh_responses_are_served_from_the_cache(dummy_data):
+    stub_application({'Cache-Control': 'max-age=60'})
+
+    cache = HTTPCache()
+    client = cached_client(dummy_data, cache)
+
+    assert client.get_application('xx-xx-xx-xx') == {'id': 'xx-xx-xx-xx'}
+    assert client.get_application('xx-xx-xx-xx') == {'id': 'xx-xx-xx-xx'}
+    assert len(responses.calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@responses.activate
+def test_cached_responses_are_copies(dummy_data):
+    stub_application({'ETag': '"v1"', 'Cache-Control': 'max-age=60'})
+
+    client = cached_client(dummy_data, HTTPCache())
+
+    client.get_application('xx-xx-xx-xx')['id'] = 'changed'
+    client.get_application('xx-xx-xx-xx')['id'] = 'changed'
+    assert client.get_application('xx-xx-xx-xx') == {'id': 'xx-xx-xx-xx'}
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_stale_responses_are_revalidated(dummy_data):
+    stub_application({'ETag': '"v1"', 'Cache-Control': 'no-cache'})
+    stub_application({'ETag': '"v1"'}, status=304, body='')
+
+    cache = HTTPCache()
+    client = cached_client(dummy_data, cache)
+
+    assert client.get_application('xx-xx-xx-xx') == {'id': 'xx-xx-xx-xx'}
+    assert client.get_application('xx-xx-xx-xx') == {'id': 'xx-xx-xx-xx'}
+
+    assert 'If-None-Match' not in responses.calls[0].request.headers
+    assert responses.calls[1].request.headers['If-None-Match'] == '"v1"'
+    assert cache.revalidations == 1
+
+
+@responses.activate
+def test_expires_and_last_modified(dummy_data, tmpdir):
+    stub_application({'Date': 'Mon, 01 Jan 2018 00:00:00 GMT', 'Expires': 'Mon, 01 Jan 2018 00:00:00 GMT',
+                      'Last-Modified': 'Sun, 31 Dec 2017 00:00:00 GMT'})
+    stub_application({'Cache-Control': 'max-age=60'}, status=304, body='')
+
+    client = cached_client(dummy_data, HTTPCache(SQLiteCache(str(tmpdir.join('http.db')))))
+
+    for _ in range(3):
+        assert client.get_application('xx-xx-xx-xx') == {'id': 'xx-xx-xx-xx'}
+
+    assert len(responses.calls) == 2
+    assert responses.calls[1].request.headers['If-Modified-Since'] == 'Sun, 31 Dec 2017 00:00:00 GMT'
+
+
+@responses.activate
+def test_uncacheable_responses(dummy_data):
+    stub_application({'Cache-Control': 'no-store', 'ETag': '"v1"'})
+    stub_application({})
+
+    client = cached_client(dummy_data, HTTPCache())
+
+    client.get_application('xx-xx-xx-xx')
+    client.get_application('xx-xx-xx-xx')
+    client.get_application('xx-xx-xx-xx')
+
+    assert len(responses.calls) == 3
+    assert all('If-None-Match' not in call.request.headers for call in responses.calls)
+
+
+@responses.activate
+def test_changes_invalidate_the_resource_and_its_collection(dummy_data):
+    stub_application({'Cache-Control': 'max-age=60'})
+    responses.add(responses.GET, 'https://api.nexmo.com/v1/applications', body='{"count": 1}', status=200,
+                  content_type='application/json', adding_headers={'Cache-Control': 'max-age=60'})
+    responses.add(responses.PUT, APPLICATIONS_URL, body='{"id": "xx-xx-xx-xx"}', status=200,
+                  content_type='application/json')
+    responses.add(responses.DELETE, APPLICATIONS_URL, status=204)
+
+    cache = HTTPCache()
+    client = cached_client(dummy_data, cache)
+
+    def gets():
+        return len([call for call in responses.calls if call.request.method == 'GET'])
+
+    client.get_application('xx-xx-xx-xx')
+    client.get_applications(page_size=10)
+    client.get_application('xx-xx-xx-xx')
+    client.get_applications(page_size=10)
+    assert gets() == 2
+
+    client.update_application('xx-xx-xx-xx', name='Renamed')
+    client.get_application('xx-xx-xx-xx')
+    client.get_applications(page_size=10)
+    assert gets() == 4
+
+    client.delete_application('xx-xx-xx-xx')
+    client.get_application('xx-xx-xx-xx')
+    assert gets() == 5
+
+
+def test_cache_key_omits_the_secret():
+    assert cache_key('https://rest.nexmo.com/account/numbers', {'api_key': 'key', 'api_secret': 'secret', 'size': 10}) \
+        == 'https://rest.nexmo.com/account/numbers?api_key=key&size=10'
@@ -1,3 +1,16 @@
+import json
+import threading
+
+try:
+    from urllib.parse import parse_qsl
+    from urllib.request import Request, urlopen
+except ImportError:
+    from urlparse import parse_qsl
+    from urllib2 import Request, urlopen
+
+import nexmo
+from nexmo.cache import SQLiteCache
+from nexmo.insight import InsightCache, InsightPipeline, InsightResult
 from util import *
 
 
@@ -47,3 +60,132 @@ def test_request_number_insight(client, dummy_data):
     assert request_user_agent() == dummy_data.user_agent
     assert 'number=447525856424' in request_body()
     assert 'callback=https%3A%2F%2Fexample.com' in request_body()
+
+
+def stub_insight(level):
+    responses.add(responses.GET, 'https://api.nexmo.com/ni/{0}/json'.format(level), status=200,
+                  content_type='application/json',
+                  body='{"status": 0, "international_format_number": "447525856424", "level": "%s"}' % level)
+
+
+@responses.activate
+def test_insight_cache(dummy_data):
+    stub_insight('basic')
+
+    cache = InsightCache()
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, insight_cache=cache)
+
+    first = client.get_basic_number_insight(number='447525856424')
+    second = client.get_basic_number_insight(number='+44 7525 856424')
+
+    assert first == second
+    assert len(responses.calls) == 1
+    assert cache.stats == {'hits': {'basic': 1, 'standard': 0, 'advanced': 0},
+                           'misses': {'basic': 1, 'standard': 0, 'advanced': 0}}
+
+
+@responses.activate
+def test_insight_cache_returns_copies(dummy_data):
+    stub_insight('basic')
+
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, insight_cache=InsightCache())
+
+    client.get_basic_number_insight(number='447525856424')['level'] = 'changed'
+    client.get_basic_number_insight(number='447525856424')['level'] = 'changed'
+    assert client.get_basic_number_insight(number='447525856424')['level'] == 'basic'
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_insight_cache_higher_level_satisfies_lower_level(dummy_data):
+    stub_insight('advanced')
+    stub_insight('standard')
+
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, insight_cache=InsightCache())
+
+    client.get_advanced_number_insight(number='447525856424')
+    assert client.get_basic_number_insight(number='447525856424')['level'] == 'advanced'
+    assert client.get_standard_number_insight(number='447525856424')['level'] == 'advanced'
+    assert client.get_advanced_number_insight(number='447525856424', cnam='true')['level'] == 'advanced'
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_insight_cache_does_not_cache_errors(dummy_data):
+    responses.add(responses.GET, 'https://api.nexmo.com/ni/basic/json', status=200, content_type='application/json',
+                  body='{"status": 3, "status_message": "Invalid request"}')
+
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, insight_cache=InsightCache())
+
+    client.get_basic_number_insight(number='bad')
+    client.get_basic_number_insight(number='bad')
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_insight_cache_ttls_and_shared_backend(dummy_data, tmpdir):
+    stub_insight('advanced')
+
+    path = str(tmpdir.join('insight.db'))
+    cache = InsightCache(SQLiteCache(path), ttls={'advanced': -1, 'standard': 60})
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, insight_cache=cache)
+
+    client.get_advanced_number_insight(number='447525856424')
+    client.get_advanced_number_insight(number='447525856424')
+    assert len(responses.calls) == 2
+
+    stub_insight('standard')
+    client.get_standard_number_insight(number='447525856424')
+
+    other = InsightCache(SQLiteCache(path))
+    assert other.get('basic', {'number': '447525856424'})['level'] == 'standard'
+
+
+def post_callback(url, params):
+    body = json.dumps(params).encode('utf-8')
+    request = Request(url, body, {'Content-Type': 'application/json'})
+    urlopen(request).read()
+
+
+@responses.activate
+def test_insight_pipeline(dummy_data):
+    pipeline = InsightPipeline(nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret), rate=100,
+                               timeout=0.5)
+
+    def request_callback(request):
+        params = dict(parse_qsl(request.body))
+        number = params['number']
+        if number == 'bad':
+            return 200, {}, json.dumps({'status': 3, 'status_message': 'Invalid request'})
+        request_id = 'id-' + number
+        if number != 'slow':
+            threading.Timer(0.05, post_callback,
+                            [params['callback'], {'request_id': request_id, 'status': 0, 'number': number}]).start()
+        return 200, {}, json.dumps({'request_id': request_id, 'number': number, 'status': 0})
+
+    responses.add_callback(responses.POST, 'https://rest.nexmo.com/ni/json', callback=request_callback,
+                           content_type='application/json')
+    responses.add_passthru(pipeline.callback_url)
+
+    with pipeline:
+        results = dict((result.number, result) for result in pipeline.run(['447700900001', '447700900002', 'bad',
+                                                                           'slow']))
+
+    assert sorted(results) == ['447700900001', '447700900002', 'bad', 'slow']
+    assert results['447700900001'].error is None
+    assert results['447700900001'].result['request_id'] == 'id-447700900001'
+    assert isinstance(results['bad'].error, nexmo.ClientError)
+    assert isinstance(results['slow'].error, nexmo.Error)
+
+
+def test_insight_pipeline_callback_before_submission_response(dummy_data):
+    class Client(object):
+        def request_number_insight(self, params):
+            pipeline.receive({'request_id': 'abc', 'status': 0})
+            return {'request_id': 'abc', 'status': 0}
+
+    pipeline = InsightPipeline(Client(), 'https://example.com/insight', serve=False, rate=100, timeout=1)
+
+    results = list(pipeline.run(['447700900001']))
+
+    assert results == [InsightResult('447700900001', 'abc', {'request_id': 'abc', 'status': 0}, None)]
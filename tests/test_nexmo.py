@@ -106,6 +106,29 @@ def test_check_signature(dummy_data):
     assert client.check_signature(params)
 
 
+def test_check_signature_does_not_modify_params(dummy_data):
+    params = {'a': '1', 'b': '2', 'sig': '6af838ef94998832dbfc29020b564830'}
+
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, signature_secret='secret')
+
+    assert not client.check_signature(params)
+    assert params == {'a': '1', 'b': '2', 'sig': '6af838ef94998832dbfc29020b564830'}
+
+
+def test_check_signatures(dummy_data):
+    valid = {'a': '1', 'b': '2', 'timestamp': '1461605396',
+             'sig': 'a321e824b9b816be7c3f28859a31749a098713d39f613c80d455bbaffae1cd24'}
+    invalid = dict(valid, b='3')
+
+    client = nexmo.Client(
+        key=dummy_data.api_key,
+        secret=dummy_data.api_secret,
+        signature_secret=dummy_data.signature_secret,
+        signature_method='sha256')
+
+    assert client.check_signatures([valid, invalid, valid]) == [True, False, True]
+
+
 def test_signature(client, dummy_data):
     params = {'a': '1', 'b': '2', 'timestamp': '1461605396'}
     client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, signature_secret='secret')
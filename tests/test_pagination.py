@@ -0,0 +1,136 @@
+import json
+import time
+
+try:
+    from urllib.parse import parse_qs
+except ImportError:
+    from urlparse import parse_qs
+
+from nexmo.pagination import iterate_pages
+from util import *
+
+
+def request_params(request):
+    return dict((key, values[0]) for key, values in parse_qs(urlparse(request.url).query).items())
+
+
+def numbers_callback(total):
+    def callback(request):
+        params = request_params(request)
+        index, size = int(params['index']), int(params['size'])
+        numbers = [{'msisdn': str(n)} for n in range((index - 1) * size, min(index * size, total))]
+        return 200, {}, json.dumps({'count': total, 'numbers': numbers})
+    return callback
+
+
+def calls_callback(total):
+    def callback(request):
+        params = request_params(request)
+        start, size = int(params['record_index']), int(params['page_size'])
+        calls = [{'uuid': str(n)} for n in range(start, min(start + size, total))]
+        return 200, {}, json.dumps({'count': total, 'page_size': size, 'record_index': start,
+                                    '_embedded': {'calls': calls}})
+    return callback
+
+
+def test_iterate_pages_prefetches_one_page_ahead():
+    fetched = []
+
+    def fetch_page(number):
+        fetched.append(number)
+        return [number], number < 9
+
+    pages = iterate_pages(fetch_page, prefetch=1)
+    assert next(pages) == 0
+    time.sleep(0.2)
+    assert fetched == [0, 1]
+
+    pages.close()
+    time.sleep(0.2)
+    assert fetched == [0, 1]
+
+
+def test_iterate_pages_without_prefetch():
+    fetched = []
+
+    def fetch_page(number):
+        fetched.append(number)
+        return [number, number], number < 2
+
+    assert list(iterate_pages(fetch_page, prefetch=0)) == [0, 0, 1, 1, 2, 2]
+    assert fetched == [0, 1, 2]
+
+
+def test_iterate_pages_raises_errors():
+    def fetch_page(number):
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        list(iterate_pages(fetch_page))
+
+
+@responses.activate
+def test_iter_account_numbers(client):
+    responses.add_callback(responses.GET, 'https://rest.nexmo.com/account/numbers', callback=numbers_callback(25),
+                           content_type='application/json')
+
+    numbers = list(client.iter_account_numbers(size=10))
+
+    assert [number['msisdn'] for number in numbers] == [str(n) for n in range(25)]
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_iter_available_numbers(client):
+    responses.add_callback(responses.GET, 'https://rest.nexmo.com/number/search', callback=numbers_callback(20),
+                           content_type='application/json')
+
+    numbers = list(client.iter_available_numbers('GB', size=10, prefetch=0))
+
+    assert len(numbers) == 20
+    assert len(responses.calls) == 2
+    assert 'country=GB' in request_query()
+
+
+@responses.activate
+def test_iter_calls(client):
+    responses.add_callback(responses.GET, 'https://api.nexmo.com/v1/calls', callback=calls_callback(150),
+                           content_type='application/json')
+
+    calls = list(client.iter_calls())
+
+    assert [call['uuid'] for call in calls] == [str(n) for n in range(150)]
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_iter_applications(client):
+    def callback(request):
+        params = request_params(request)
+        page = int(params['page_index'])
+        applications = [{'id': 'app-{0}'.format(page)}] if page < 3 else []
+        return 200, {}, json.dumps({'count': 3, 'page_size': 1, 'page_index': page,
+                                    '_embedded': {'applications': applications}})
+
+    responses.add_callback(responses.GET, 'https://api.nexmo.com/v1/applications', callback=callback,
+                           content_type='application/json')
+
+    applications = list(client.iter_applications(page_size=1))
+
+    assert [application['id'] for application in applications] == ['app-0', 'app-1', 'app-2']
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_iter_messages(client):
+    def callback(request):
+        ids = parse_qs(urlparse(request.url).query)['ids']
+        return 200, {}, json.dumps({'count': len(ids), 'items': [{'message-id': i} for i in ids]})
+
+    responses.add_callback(responses.GET, 'https://rest.nexmo.com/search/messages', callback=callback,
+                           content_type='application/json')
+
+    ids = ['id-{0}'.format(n) for n in range(25)]
+
+    assert [message['message-id'] for message in client.iter_messages(ids)] == ids
+    assert len(responses.calls) == 3
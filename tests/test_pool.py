@@ -0,0 +1,150 @@
+try:
+    from urllib.parse import parse_qs
+except ImportError:
+    from urlparse import parse_qs
+
+import nexmo
+from nexmo.pool import KeyPool
+from util import *
+
+
+def request_api_key(index):
+    return parse_qs(responses.calls[index].request.body)['api_key'][0]
+
+
+@responses.activate
+def test_calls_are_spread_across_keys():
+    stub(responses.POST, 'https://rest.nexmo.com/sms/json')
+
+    pool = KeyPool([('key-a', 'secret-a'), ('key-b', 'secret-b')])
+
+    for _ in range(4):
+        pool.send_message({'from': 'Python', 'to': '447525856424', 'text': 'Hey!'})
+
+    keys = [request_api_key(index) for index in range(4)]
+    assert keys.count('key-a') == 2
+    assert keys.count('key-b') == 2
+
+
+@responses.activate
+def test_calls_are_weighted():
+    stub(responses.POST, 'https://rest.nexmo.com/sms/json')
+
+    pool = KeyPool([{'key': 'key-a', 'secret': 'secret-a', 'weight': 3}, {'key': 'key-b', 'secret': 'secret-b'}])
+
+    for _ in range(8):
+        pool.send_message({'to': '447525856424', 'text': 'Hey!'})
+
+    keys = [request_api_key(index) for index in range(8)]
+    assert keys.count('key-a') == 6
+    assert keys.count('key-b') == 2
+
+
+@responses.activate
+def test_authentication_error_removes_key_from_rotation():
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', status=401)
+    stub(responses.POST, 'https://rest.nexmo.com/sms/json')
+
+    pool = KeyPool([('key-a', 'secret-a'), ('key-b', 'secret-b')])
+
+    assert isinstance(pool.send_message({'to': '447525856424', 'text': 'Hey!'}), dict)
+    assert pool.active_keys == ['key-b']
+
+
+@responses.activate
+def test_throttled_key_is_suspended():
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', status=429)
+    stub(responses.POST, 'https://rest.nexmo.com/sms/json')
+
+    pool = KeyPool([('key-a', 'secret-a'), ('key-b', 'secret-b')], max_throttled=1)
+
+    assert isinstance(pool.send_message({'to': '447525856424', 'text': 'Hey!'}), dict)
+    assert pool.active_keys == ['key-b']
+
+
+@responses.activate
+def test_throttled_messages_are_retried_on_another_key():
+    throttled = '{"message-count":"1","messages":[{"status":"1","error-text":"Throughput Rate Exceeded"}]}'
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', body=throttled, status=200,
+                  content_type='application/json')
+    stub(responses.POST, 'https://rest.nexmo.com/sms/json')
+
+    pool = KeyPool([('key-a', 'secret-a'), ('key-b', 'secret-b')])
+
+    assert pool.send_message({'to': '447525856424', 'text': 'Hey!'}) == {'key': 'value'}
+    assert len(responses.calls) == 2
+    assert request_api_key(0) != request_api_key(1)
+
+
+@responses.activate
+def test_throttled_response_returned_when_every_key_is_throttled():
+    throttled = '{"message-count":"1","messages":[{"status":"1","error-text":"Throughput Rate Exceeded"}]}'
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', body=throttled, status=200,
+                  content_type='application/json')
+
+    pool = KeyPool([('key-a', 'secret-a'), ('key-b', 'secret-b')])
+
+    assert pool.send_message({'to': '447525856424', 'text': 'Hey!'})['messages'][0]['status'] == '1'
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_partly_throttled_message_is_not_retried():
+    body = '{"message-count":"2","messages":[{"status":"0"},{"status":"1"}]}'
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', body=body, status=200,
+                  content_type='application/json')
+
+    pool = KeyPool([('key-a', 'secret-a'), ('key-b', 'secret-b')])
+
+    pool.send_message({'to': '447525856424', 'text': 'Hey!'})
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_other_client_errors_are_raised():
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', body='429 Too Many', status=400)
+
+    pool = KeyPool([('key-a', 'secret-a'), ('key-b', 'secret-b')])
+
+    with pytest.raises(nexmo.ClientError) as excinfo:
+        pool.send_message({'to': '447525856424', 'text': 'Hey!'})
+
+    assert excinfo.value.status_code == 400
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_last_error_is_raised_when_every_key_is_throttled():
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', status=429)
+
+    pool = KeyPool([('key-a', 'secret-a')])
+
+    with pytest.raises(nexmo.ClientError) as excinfo:
+        pool.send_message({'to': '447525856424', 'text': 'Hey!'})
+
+    assert excinfo.value.status_code == 429
+
+
+@responses.activate
+def test_no_keys_available():
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', status=401)
+
+    pool = KeyPool([('key-a', 'secret-a')])
+
+    with pytest.raises(nexmo.Error):
+        pool.send_message({'to': '447525856424', 'text': 'Hey!'})
+
+
+def test_unknown_attribute():
+    pool = KeyPool([('key-a', 'secret-a')])
+
+    with pytest.raises(AttributeError):
+        pool.no_such_method
+
+
+def test_local_methods_are_not_pooled():
+    pool = KeyPool([('key-a', 'secret-a')])
+
+    for name in ('auth', 'check_signature', 'signature', 'parse', 'iter_calls', 'iter_messages'):
+        with pytest.raises(AttributeError):
+            getattr(pool, name)
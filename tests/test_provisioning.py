@@ -0,0 +1,232 @@
+import json
+import time
+
+try:
+    from urllib.parse import parse_qs
+except ImportError:
+    from urlparse import parse_qs
+
+import nexmo
+from nexmo.provisioning import BUY, CANCEL, UNCHANGED, UPDATE, NumberIndex, reconcile_numbers, \
+    search_available_numbers
+from util import *
+
+NUMBERS = [
+    {'country': 'GB', 'msisdn': '447700900000', 'type': 'mobile-lvn', 'features': ['SMS', 'VOICE'],
+     'voiceCallbackType': 'app', 'voiceCallbackValue': 'app-1'},
+    {'country': 'GB', 'msisdn': '447700900001', 'type': 'landline', 'features': ['VOICE']},
+    {'country': 'US', 'msisdn': '14155550100', 'type': 'mobile-lvn', 'features': ['SMS']},
+]
+
+
+def stub_account_numbers(numbers):
+    responses.add(responses.GET, 'https://rest.nexmo.com/account/numbers', status=200,
+                  content_type='application/json', body=json.dumps({'count': len(numbers), 'numbers': numbers}))
+
+
+def msisdns(numbers):
+    return [number['msisdn'] for number in numbers]
+
+
+@responses.activate
+def test_number_index(client):
+    stub_account_numbers(NUMBERS)
+
+    index = NumberIndex(client)
+    added, removed, changed = index.refresh()
+
+    assert added == {'447700900000', '447700900001', '14155550100'}
+    assert len(index) == 3
+    assert index.get('447700900001')['type'] == 'landline'
+    assert msisdns(index.find(country='GB')) == ['447700900000', '447700900001']
+    assert msisdns(index.find(country='GB', feature='SMS')) == ['447700900000']
+    assert msisdns(index.find(type='mobile-lvn')) == ['14155550100', '447700900000']
+    assert msisdns(index.find(application_id='app-1')) == ['447700900000']
+    assert index.find(country='FR') == []
+
+
+@responses.activate
+def test_number_index_refresh_applies_differences(client):
+    stub_account_numbers(NUMBERS)
+    index = NumberIndex(client)
+    index.refresh()
+
+    responses.reset()
+    updated = dict(NUMBERS[1], features=['VOICE', 'SMS'])
+    stub_account_numbers([NUMBERS[0], updated, {'country': 'FR', 'msisdn': '33612345678', 'features': ['SMS']}])
+
+    added, removed, changed = index.refresh()
+
+    assert (added, removed, changed) == ({'33612345678'}, {'14155550100'}, {'447700900001'})
+    assert msisdns(index.find(feature='SMS')) == ['33612345678', '447700900000', '447700900001']
+    assert index.find(country='US') == []
+
+
+@responses.activate
+def test_number_index_updates_after_changes(client):
+    stub_account_numbers(NUMBERS)
+    stub(responses.POST, 'https://rest.nexmo.com/number/buy')
+    stub(responses.POST, 'https://rest.nexmo.com/number/cancel')
+    stub(responses.POST, 'https://rest.nexmo.com/number/update')
+
+    index = NumberIndex(client)
+    index.refresh()
+
+    index.buy_number(country='FR', msisdn='33612345678')
+    index.cancel_number(country='US', msisdn='14155550100')
+    index.update_number(country='GB', msisdn='447700900001', voiceCallbackType='app', voiceCallbackValue='app-2')
+
+    assert '33612345678' in index
+    assert '14155550100' not in index
+    assert msisdns(index.find(country='FR')) == ['33612345678']
+    assert msisdns(index.find(application_id='app-2')) == ['447700900001']
+    assert index.get('447700900001')['features'] == ['VOICE']
+
+
+@responses.activate
+def test_number_index_ignores_failed_changes(client):
+    stub_account_numbers(NUMBERS)
+    responses.add(responses.POST, 'https://rest.nexmo.com/number/cancel', status=200, content_type='application/json',
+                  body='{"error-code": "420", "error-code-label": "cancel failed"}')
+
+    index = NumberIndex(client)
+    index.refresh()
+    index.cancel_number(country='US', msisdn='14155550100')
+
+    assert '14155550100' in index
+
+
+def stub_number_search(available):
+    def callback(request):
+        query = parse_qs(urlparse(request.url).query)
+        numbers = [number for number in available
+                   if number['country'] == query['country'][0] and
+                   number['msisdn'].find(query.get('pattern', [''])[0]) >= 0 and
+                   set(query.get('features', [''])[0].split(',')) - {''} <= set(number['features'])]
+        return 200, {}, json.dumps({'count': len(numbers), 'numbers': numbers})
+
+    responses.add_callback(responses.GET, 'https://rest.nexmo.com/number/search', callback=callback,
+                           content_type='application/json')
+
+
+AVAILABLE = [
+    {'country': 'GB', 'msisdn': '447700900100', 'features': ['SMS', 'VOICE']},
+    {'country': 'GB', 'msisdn': '447700900200', 'features': ['VOICE']},
+    {'country': 'FR', 'msisdn': '33612345100', 'features': ['SMS']},
+    {'country': 'DE', 'msisdn': '4915112345100', 'features': ['SMS', 'VOICE']},
+]
+
+
+@responses.activate
+def test_search_available_numbers(client):
+    stub_number_search(AVAILABLE)
+
+    numbers = search_available_numbers(client, ['GB', 'FR', 'DE'], patterns=['100', '00'], features=['SMS'],
+                                       rate=100)
+
+    assert sorted(msisdns(numbers)) == ['33612345100', '447700900100', '4915112345100']
+    assert len(responses.calls) == 6
+
+
+@responses.activate
+def test_search_available_numbers_stops_at_quantity(client):
+    stub_number_search(AVAILABLE)
+
+    numbers = list(search_available_numbers(client, ['GB', 'FR', 'DE'], quantity=2, rate=1, workers=1))
+
+    assert len(numbers) == 2
+    assert len(responses.calls) == 1
+
+
+def test_search_available_numbers_waits_for_a_slow_caller():
+    pages = []
+
+    class Client(object):
+        def get_available_numbers(self, country_code, params):
+            pages.append(params['index'])
+            numbers = [{'msisdn': '{0}{1:06d}'.format(country_code, params['index'] * 100 + offset)}
+                       for offset in range(params['size'])]
+            return {'count': 100000, 'numbers': numbers}
+
+    numbers = search_available_numbers(Client(), ['GB'], rate=1000, buffer=10)
+    next(numbers)
+    time.sleep(0.3)
+
+    assert len(pages) <= 2
+    numbers.close()
+
+
+DESIRED = {
+    '447700900000': {'country': 'GB', 'voiceCallbackType': 'app', 'voiceCallbackValue': 'app-1'},
+    '447700900001': {'country': 'GB', 'moHttpUrl': 'https://example.com/inbound'},
+    '14155550100': None,
+    '33612345678': {'country': 'FR', 'moHttpUrl': 'https://example.com/inbound'},
+}
+
+
+@responses.activate
+def test_reconcile_numbers_dry_run(client):
+    stub_account_numbers(NUMBERS)
+
+    results = dict((result.msisdn, result) for result in reconcile_numbers(client, DESIRED, dry_run=True))
+
+    assert results['447700900000'].action == UNCHANGED
+    assert results['447700900001'].action == UPDATE
+    assert results['447700900001'].changes == {'moHttpUrl': (None, 'https://example.com/inbound')}
+    assert results['14155550100'].action == CANCEL
+    assert results['33612345678'].action == BUY
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_reconcile_numbers(client):
+    stub_account_numbers(NUMBERS)
+    stub(responses.POST, 'https://rest.nexmo.com/number/buy')
+    stub(responses.POST, 'https://rest.nexmo.com/number/cancel')
+    responses.add(responses.POST, 'https://rest.nexmo.com/number/update', status=200, content_type='application/json',
+                  body='{"error-code": "200", "error-code-label": "success"}')
+
+    results = reconcile_numbers(client, DESIRED)
+
+    assert [(result.msisdn, result.action, result.error) for result in results] == [
+        ('14155550100', CANCEL, None),
+        ('33612345678', BUY, None),
+        ('447700900000', UNCHANGED, None),
+        ('447700900001', UPDATE, None),
+    ]
+
+    bodies = sorted((call.request.url.split('/')[-1], call.request.body) for call in responses.calls[1:])
+    assert [url for url, body in bodies] == ['buy', 'cancel', 'update', 'update']
+    assert all('moHttpUrl=https%3A%2F%2Fexample.com%2Finbound' in body for url, body in bodies if url == 'update')
+
+
+@responses.activate
+def test_reconcile_numbers_reports_failures(client):
+    stub_account_numbers(NUMBERS)
+    responses.add(responses.POST, 'https://rest.nexmo.com/number/cancel', status=200, content_type='application/json',
+                  body='{"error-code": "420", "error-code-label": "cancel failed"}')
+
+    index = NumberIndex(client)
+    index.refresh()
+
+    results = reconcile_numbers(client, {}, cancel_unlisted=True, index=index)
+
+    assert [result.action for result in results] == [CANCEL] * 3
+    assert all(isinstance(result.error, nexmo.ClientError) for result in results)
+    assert len(index) == 3
+
+
+@responses.activate
+def test_reconcile_numbers_requires_a_country_to_buy(client):
+    stub_account_numbers(NUMBERS)
+    stub(responses.POST, 'https://rest.nexmo.com/number/buy')
+
+    desired = {'33612345678': {'moHttpUrl': 'https://example.com/inbound'}, '34612345678': {'country': 'ES'}}
+
+    results = reconcile_numbers(client, desired, dry_run=True)
+    assert [(result.action, type(result.error)) for result in results] == [(BUY, ValueError), (BUY, type(None))]
+
+    results = reconcile_numbers(client, desired)
+    assert isinstance(results[0].error, ValueError)
+    assert results[1].error is None
+    assert [call.request.url.split('/')[-1] for call in responses.calls[2:]] == ['buy']
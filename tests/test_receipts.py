@@ -0,0 +1,132 @@
+import multiprocessing
+import os.path
+import time
+
+import pytest
+
+import nexmo
+from nexmo.receipts import ReceiptStore
+
+
+@pytest.fixture
+def store_path(tmpdir):
+    return os.path.join(str(tmpdir), 'receipts.idx')
+
+
+def test_add_and_get(store_path):
+    store = ReceiptStore(store_path, capacity=16)
+    timestamp = time.time()
+    store.add('0A0000001234567B', 'order-1', timestamp=timestamp, parts=2, price='0.0333')
+
+    sent = store.get('0A0000001234567B')
+    assert sent == ('0A0000001234567B', 'order-1', timestamp, 2, 0.0333)
+    assert store.get('0A0000001234567C') is None
+
+
+def test_record_response(store_path):
+    store = ReceiptStore(store_path, capacity=16)
+    store.record_response({'message-count': '2', 'messages': [
+        {'status': '0', 'message-id': 'part-1', 'message-price': '0.0333', 'client-ref': 'order-1'},
+        {'status': '0', 'message-id': 'part-2', 'message-price': '0.0333', 'client-ref': 'order-1'},
+    ]})
+
+    assert store.get('part-1').client_ref == 'order-1'
+    assert store.get('part-2').parts == 2
+
+
+def test_pop_and_reuse_deleted_slots(store_path):
+    store = ReceiptStore(store_path, capacity=2)
+    store.add('message-1')
+    store.add('message-2')
+
+    with pytest.raises(nexmo.Error):
+        store.add('message-3')
+
+    assert store.pop('message-1').message_id == 'message-1'
+    assert store.get('message-1') is None
+    assert store.get('message-2') is not None
+
+    store.add('message-3')
+    assert store.get('message-3') is not None
+
+
+def test_expired_records(store_path):
+    store = ReceiptStore(store_path, capacity=1, ttl=60)
+    store.add('message-1', timestamp=time.time() - 120)
+
+    assert store.get('message-1') is None
+
+    store.add('message-2')
+    assert store.get('message-2') is not None
+
+
+def test_store_persists_and_keeps_its_capacity(store_path):
+    store = ReceiptStore(store_path, capacity=8)
+    store.add('message-1', 'order-1')
+    store.close()
+
+    store = ReceiptStore(store_path, capacity=1000)
+    assert store.capacity == 8
+    assert store.get('message-1').client_ref == 'order-1'
+
+
+def add_from_child(path):
+    ReceiptStore(path).add('from-child', 'child')
+
+
+def test_store_is_shared_between_processes(store_path):
+    store = ReceiptStore(store_path, capacity=64)
+
+    process = multiprocessing.Process(target=add_from_child, args=(store_path,))
+    process.start()
+    process.join()
+
+    assert store.get('from-child').client_ref == 'child'
+
+
+def test_deletes_keep_probe_sequences_short(store_path):
+    store = ReceiptStore(store_path, capacity=512)
+    live = {}
+
+    for index in range(20000):
+        message_id = 'message-{0}'.format(index)
+        store.add(message_id, str(index))
+        live[message_id] = str(index)
+        if len(live) > 300:
+            oldest = 'message-{0}'.format(index - 300)
+            assert store.pop(oldest).client_ref == live.pop(oldest)
+
+    assert all(store.get(message_id).client_ref == client_ref for message_id, client_ref in live.items())
+    assert store.get('message-0') is None
+
+    # With tombstones, the run of occupied slots would eventually cover the whole table.
+    empty = sum(1 for slot in range(store.capacity) if store._map[store._offset(slot)] in (0, b'\0'))
+    assert empty == store.capacity - len(live)
+
+
+def test_expired_records_are_cleared_from_probe_sequences(store_path):
+    store = ReceiptStore(store_path, capacity=8, ttl=60)
+    for index in range(8):
+        store.add('old-{0}'.format(index), timestamp=time.time() - 120)
+
+    for index in range(8):
+        store.add('new-{0}'.format(index))
+
+    assert all(store.get('new-{0}'.format(index)) is not None for index in range(8))
+
+
+def create_concurrently(path, name):
+    ReceiptStore(path, capacity=64).add(name, name)
+
+
+def test_concurrent_creation_keeps_every_record(store_path):
+    processes = [multiprocessing.Process(target=create_concurrently, args=(store_path, 'worker-{0}'.format(index)))
+                 for index in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    store = ReceiptStore(store_path)
+    assert store.capacity == 64
+    assert all(store.get('worker-{0}'.format(index)).client_ref == 'worker-{0}'.format(index) for index in range(4))
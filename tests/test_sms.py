@@ -1,4 +1,9 @@
+# -*- coding: utf-8 -*-
+import requests
+
 import nexmo
+from nexmo.cache import MemoryCache
+from nexmo.sms import MessageTemplate, message_type, segment, segment_many
 from util import *
 
 
@@ -47,3 +52,190 @@ def test_submit_sms_conversion(client):
     client.submit_sms_conversion('a-message-id')
     assert 'message-id=a-message-id' in request_body()
     assert 'timestamp' in request_body()
+
+
+@responses.activate
+def test_send_message_with_idempotency_store(dummy_data):
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', status=200, content_type='application/json',
+                  body='{"message-count":"1","messages":[{"status":"0","message-id":"abc123"}]}')
+
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, idempotency_store=MemoryCache())
+
+    params = {'from': 'Python', 'to': '447525856424', 'text': 'Hey!', 'client-ref': 'order-1'}
+
+    first = client.send_message(params)
+    second = client.send_message(params)
+
+    assert first == second
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_send_message_with_idempotency_store_does_not_record_failures(dummy_data):
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', status=200, content_type='application/json',
+                  body='{"message-count":"1","messages":[{"status":"1","error-text":"Throttled"}]}')
+
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, idempotency_store=MemoryCache())
+
+    params = {'from': 'Python', 'to': '447525856424', 'text': 'Hey!', 'client-ref': 'order-1'}
+
+    client.send_message(params)
+    client.send_message(params)
+
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_send_message_with_idempotency_store_records_partial_sends(dummy_data):
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', status=200, content_type='application/json',
+                  body='{"message-count":"2","messages":[{"status":"0"},{"status":"1"}]}')
+
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, idempotency_store=MemoryCache())
+
+    params = {'from': 'Python', 'to': '447525856424', 'text': 'Hey!' * 100, 'client-ref': 'order-1'}
+
+    first = client.send_message(params)
+    second = client.send_message(params)
+
+    assert first == second
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_send_message_with_idempotency_store_after_timeout(dummy_data):
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', body=requests.exceptions.ReadTimeout())
+
+    store = MemoryCache()
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, idempotency_store=store)
+
+    params = {'from': 'Python', 'to': '447525856424', 'text': 'Hey!', 'client-ref': 'order-1'}
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.send_message(params)
+
+    with pytest.raises(nexmo.IdempotencyError):
+        client.send_message(params)
+
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_send_message_with_idempotency_store_while_in_flight(dummy_data):
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, idempotency_store=MemoryCache())
+    params = {'from': 'Python', 'to': '447525856424', 'text': 'Hey!', 'client-ref': 'order-1'}
+    errors = []
+
+    def callback(request):
+        # A concurrent send with the same client-ref, made while this one is in flight.
+        try:
+            client.send_message(params)
+        except nexmo.IdempotencyError as e:
+            errors.append(e)
+        return 200, {}, '{"message-count":"1","messages":[{"status":"0","message-id":"abc123"}]}'
+
+    responses.add_callback(responses.POST, 'https://rest.nexmo.com/sms/json', callback=callback,
+                           content_type='application/json')
+
+    client.send_message(params)
+
+    assert len(errors) == 1
+    assert len(responses.calls) == 1
+    assert client.send_message(params)['messages'][0]['message-id'] == 'abc123'
+
+
+@responses.activate
+def test_send_message_with_idempotency_store_releases_key_on_error_response(dummy_data):
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', status=500)
+
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, idempotency_store=MemoryCache())
+    params = {'from': 'Python', 'to': '447525856424', 'text': 'Hey!', 'client-ref': 'order-1'}
+
+    for _ in range(2):
+        with pytest.raises(nexmo.ServerError):
+            client.send_message(params)
+
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_message_template(client, dummy_data):
+    stub(responses.POST, 'https://rest.nexmo.com/sms/json')
+
+    template = MessageTemplate(client, {'from': 'Python', 'type': 'unicode'})
+
+    assert isinstance(template.send('447525856424', u'Hey \u263a!', **{'client-ref': 'ref-1'}), dict)
+    assert request_user_agent() == dummy_data.user_agent
+    assert request_content_type() == 'application/x-www-form-urlencoded'
+    assert 'from=Python' in request_body()
+    assert 'type=unicode' in request_body()
+    assert 'api_key=nexmo-api-key' in request_body()
+    assert 'to=447525856424' in request_body()
+    assert 'text=Hey+%E2%98%BA%21' in request_body()
+    assert 'client-ref=ref-1' in request_body()
+
+
+@responses.activate
+def test_message_template_reuses_constant_params(client):
+    stub(responses.POST, 'https://rest.nexmo.com/sms/json')
+
+    template = MessageTemplate(client, {'from': 'Python'})
+    template.send('447525856424', 'First')
+    template.send('447525856425', 'Second')
+
+    second = responses.calls[1].request.body
+    assert 'from=Python' in second
+    assert 'to=447525856425' in second
+    assert 'text=Second' in second
+    assert 'First' not in second
+
+
+def test_message_type():
+    assert message_type('Hello world') == 'text'
+    assert message_type(u'Price: €10 [approx]') == 'text'
+    assert message_type(u'Hello ☺') == 'unicode'
+
+
+def test_segment_single_gsm_message():
+    info = segment('a' * 160)
+    assert info == ('text', 160, 1, [(0, 160)])
+
+
+def test_segment_multipart_gsm_message():
+    info = segment('a' * 161)
+    assert info.segments == 2
+    assert info.boundaries == [(0, 153), (153, 161)]
+
+
+def test_segment_does_not_split_extended_characters():
+    info = segment('a' * 152 + '{' + 'a' * 10)
+    assert info.length == 164
+    assert info.boundaries == [(0, 152), (152, 163)]
+
+
+def test_segment_unicode_message():
+    assert segment(u'☺' * 70).segments == 1
+
+    info = segment(u'☺' * 71)
+    assert info.type == 'unicode'
+    assert info.boundaries == [(0, 67), (67, 71)]
+
+
+def test_segment_many():
+    assert [info.segments for info in segment_many(['a', 'a' * 200, u'☺' * 140])] == [1, 2, 3]
+
+
+@responses.activate
+def test_message_template_with_idempotency_store(dummy_data):
+    responses.add(responses.POST, 'https://rest.nexmo.com/sms/json', status=200, content_type='application/json',
+                  body='{"message-count":"1","messages":[{"status":"0","message-id":"abc123"}]}')
+
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret, idempotency_store=MemoryCache())
+    template = MessageTemplate(client, {'from': 'Python'})
+
+    first = template.send('447525856424', 'Hey!', **{'client-ref': 'order-1'})
+    second = template.send('447525856424', 'Hey!', **{'client-ref': 'order-1'})
+
+    assert first == second
+    assert len(responses.calls) == 1
+    assert client.send_message({'to': '447525856424', 'text': 'Hey!', 'client-ref': 'order-1'}) == first
+    assert len(responses.calls) == 1
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+import json
+
+import nexmo
+from nexmo.streaming import iter_items
+from util import *
+
+DOCUMENT = json.dumps({
+    'count': 3,
+    'page_size': 10,
+    '_links': {'self': {'href': '/v1/calls?page_size=10&record_index=0'}, 'tricky': ['"}]', '\\', {'a': [1, 2]}]},
+    'skipped': -12.5e3,
+    'flag': True,
+    '_embedded': {
+        'other': [{'uuid': 'not-this'}],
+        'calls': [
+            {'uuid': 'call-1', 'to': [{'number': '447700900000'}]},
+            {'uuid': 'call-2', 'status': u'☺ \\"quoted\\"'},
+            12345,
+        ],
+    },
+}, sort_keys=True)
+
+
+def chunked(text, size):
+    data = text.encode('utf-8')
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+def test_iter_items_with_any_chunk_size():
+    expected = json.loads(DOCUMENT)['_embedded']['calls']
+
+    for size in (1, 2, 3, 7, 64, 100000):
+        assert list(iter_items(chunked(DOCUMENT, size), ['_embedded', 'calls'])) == expected
+
+
+def test_iter_items_numbers_split_across_chunks():
+    document = '{"rate": 12.5, "skipped": [-1.5e-3, 2E+2], "numbers": [1.25, 2.5e3, -3, 0.5, 10]}'
+    expected = [1.25, 2.5e3, -3, 0.5, 10]
+
+    for size in range(1, len(document) + 1):
+        assert list(iter_items(chunked(document, size), ['numbers'])) == expected, size
+
+
+def test_iter_items_corrupt_object():
+    with pytest.raises(ValueError):
+        list(iter_items(['{"count": 1 ] "numbers": [1]}'], ['numbers']))
+    with pytest.raises(ValueError):
+        list(iter_items(['{"count": 1, 2: [1]}'], ['numbers']))
+    with pytest.raises(ValueError):
+        list(iter_items(['{"numbers": {"a": 1}}'], ['numbers']))
+
+
+def test_iter_items_null_path():
+    assert list(iter_items(['{"_embedded": null}'], ['_embedded', 'calls'])) == []
+    assert list(iter_items(['{"numbers": null}'], ['numbers'])) == []
+
+
+def test_iter_items_missing_path():
+    assert list(iter_items(chunked(DOCUMENT, 5), ['_embedded', 'applications'])) == []
+    assert list(iter_items(chunked('{"count": 0}', 5), ['_embedded', 'calls'])) == []
+
+
+def test_iter_items_empty_array():
+    assert list(iter_items(['{"numbers": [', ' ]}'], ['numbers'])) == []
+
+
+def test_iter_items_is_lazy():
+    def chunks():
+        yield '{"numbers": [{"msisdn": "1"}, '
+        raise AssertionError('Read too far')
+
+    assert next(iter_items(chunks(), ['numbers'])) == {'msisdn': '1'}
+
+
+def test_iter_items_invalid_json():
+    with pytest.raises(ValueError):
+        list(iter_items(['{"numbers": [1 2]}'], ['numbers']))
+
+
+@responses.activate
+def test_iter_calls_stream(client):
+    responses.add(responses.GET, 'https://api.nexmo.com/v1/calls', body=DOCUMENT, status=200,
+                  content_type='application/json')
+
+    calls = list(client.iter_calls(page_size=10, stream=True))
+
+    assert [call['uuid'] for call in calls[:2]] == ['call-1', 'call-2']
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_iter_account_numbers_stream(client):
+    responses.add(responses.GET, 'https://rest.nexmo.com/account/numbers', status=200,
+                  content_type='application/json', body='{"count": 2, "numbers": [{"msisdn": "1"}, {"msisdn": "2"}]}')
+
+    assert [number['msisdn'] for number in client.iter_account_numbers(stream=True)] == ['1', '2']
+    assert 'index=1' in request_query()
+
+
+@responses.activate
+def test_stream_raises_errors(client):
+    responses.add(responses.GET, 'https://rest.nexmo.com/account/numbers', status=401)
+
+    with pytest.raises(nexmo.AuthenticationError):
+        client.get(client.host, '/account/numbers', stream=['numbers'])
+
+
+def test_stream_closes_the_response_on_errors(client):
+    class Response(object):
+        status_code = 500
+        headers = {'content-type': 'text/plain'}
+        content = b''
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    response = Response()
+
+    with pytest.raises(nexmo.ServerError):
+        client.parse_stream(client.host, response, ['numbers'])
+
+    assert response.closed
@@ -0,0 +1,60 @@
+import nexmo
+from nexmo.suppression import SuppressionList
+from util import *
+
+
+def stub_opt_ins():
+    responses.add(responses.GET, 'https://rest.nexmo.com/sc/us/alert/opt-in/query/json', status=200,
+                  content_type='application/json', body='''{
+                      "opt-in-count": 2,
+                      "opt-in-list": [
+                          {"msisdn": "16365553226", "opt-in-date": "2017-01-01 00:00:00", "opt-out": "true"},
+                          {"msisdn": "16365553227", "opt-in-date": "2017-01-01 00:00:00", "opt-out": "false"}
+                      ]}''')
+
+
+def test_membership_is_normalized():
+    suppressed = SuppressionList(['+1 (636) 555-3226'])
+
+    assert '16365553226' in suppressed
+    assert '16365553227' not in suppressed
+    assert list(suppressed.filter(['16365553226', '16365553227'])) == ['16365553227']
+
+
+@responses.activate
+def test_sync(client):
+    stub_opt_ins()
+
+    suppressed = SuppressionList(['16365553227', '16365553228'])
+
+    added, removed = suppressed.sync(client)
+
+    assert added == {'16365553226'}
+    assert removed == {'16365553227'}
+    assert '16365553226' in suppressed
+    assert '16365553228' in suppressed
+    assert suppressed.last_synced is not None
+
+
+@responses.activate
+def test_send_to_suppressed_number(dummy_data):
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret,
+                          suppression_list=SuppressionList(['16365553226']))
+
+    with pytest.raises(nexmo.SuppressedError):
+        client.send_event_alert_message({'to': '16365553226', 'server': 'host'})
+
+    with pytest.raises(nexmo.SuppressedError):
+        client.send_marketing_message(to='16365553226', text='Hello')
+
+    assert len(responses.calls) == 0
+
+
+@responses.activate
+def test_send_to_unsuppressed_number(dummy_data):
+    stub(responses.POST, 'https://rest.nexmo.com/sc/us/marketing/json')
+
+    client = nexmo.Client(key=dummy_data.api_key, secret=dummy_data.api_secret,
+                          suppression_list=SuppressionList(['16365553226']))
+
+    assert isinstance(client.send_marketing_message(to='16365553227', text='Hello'), dict)
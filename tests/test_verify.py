@@ -1,3 +1,10 @@
+import json
+
+try:
+    from urllib.parse import parse_qs
+except ImportError:
+    from urlparse import parse_qs
+
 from util import *
 
 
@@ -56,6 +63,28 @@ def test_get_verification(client, dummy_data):
     assert 'request_id=xxx' in request_query()
 
 
+def verify_search_callback(request):
+    request_ids = parse_qs(urlparse(request.url).query)['request_ids']
+    found = [{'request_id': request_id, 'status': 'IN PROGRESS'} for request_id in request_ids
+             if request_id != 'missing']
+    if len(found) == 1:
+        return 200, {}, json.dumps(found[0])
+    return 200, {}, json.dumps({'verification_requests': found})
+
+
+@responses.activate
+def test_get_verifications(client):
+    responses.add_callback(responses.GET, 'https://api.nexmo.com/verify/search/json', callback=verify_search_callback,
+                           content_type='application/json')
+
+    request_ids = ['id-{0}'.format(index) for index in range(21)] + ['missing']
+    verifications = client.get_verifications(request_ids)
+
+    assert len(responses.calls) == 3
+    assert sorted(verifications) == sorted(request_ids[:-1])
+    assert verifications['id-20'] == {'request_id': 'id-20', 'status': 'IN PROGRESS'}
+
+
 @responses.activate
 def test_get_verification_request(client, dummy_data):
     stub(responses.GET, 'https://api.nexmo.com/verify/search/json')
@@ -0,0 +1,149 @@
+import io
+import sys
+from wsgiref.util import setup_testing_defaults
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import pytest
+
+import nexmo
+from nexmo.webhooks import CALL_EVENT, DELIVERY_RECEIPT, INBOUND_MESSAGE, UNKNOWN, event_type, wsgi_app
+
+INBOUND_QUERY = 'msisdn=447700900001&to=447700900000&messageId=0A0000001234567B&text=Hello&type=text' \
+                '&timestamp=1461605396'
+
+
+def signing_client():
+    return nexmo.Client(signature_secret='secret', signature_method='sha256')
+
+
+def signed(query):
+    params = dict(pair.split('=') for pair in query.split('&'))
+    return query + '&sig=' + signing_client().signature(params)
+
+
+def call_wsgi(application, method='GET', query='', body=b'', content_type='application/x-www-form-urlencoded'):
+    environ = {'REQUEST_METHOD': method, 'QUERY_STRING': query, 'CONTENT_TYPE': content_type,
+               'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body)}
+    setup_testing_defaults(environ)
+
+    statuses = []
+    application(environ, lambda status, headers: statuses.append(status))
+    return statuses[0]
+
+
+def test_event_type():
+    assert event_type({'msisdn': '447700900001', 'text': 'Hello', 'messageId': 'abc'}) == INBOUND_MESSAGE
+    assert event_type({'messageId': 'abc', 'status': 'delivered', 'err-code': '0'}) == DELIVERY_RECEIPT
+    assert event_type({'uuid': 'abc', 'conversation_uuid': 'def', 'status': 'answered'}) == CALL_EVENT
+
+
+def test_wsgi_app_queues_events():
+    events = queue.Queue()
+    application = wsgi_app(signing_client(), queue=events)
+
+    assert call_wsgi(application, query=signed(INBOUND_QUERY)) == '200 OK'
+
+    event = events.get_nowait()
+    assert event.type == INBOUND_MESSAGE
+    assert event.params['text'] == 'Hello'
+
+
+def test_wsgi_app_rejects_invalid_signatures():
+    events = queue.Queue()
+    application = wsgi_app(signing_client(), queue=events)
+
+    assert call_wsgi(application, query=INBOUND_QUERY + '&sig=invalid') == '403 Forbidden'
+    assert call_wsgi(application, query=INBOUND_QUERY) == '403 Forbidden'
+    assert events.empty()
+
+
+def test_wsgi_app_accepts_unsigned_call_events():
+    events = queue.Queue()
+    application = wsgi_app(signing_client(), queue=events)
+
+    assert call_wsgi(application, 'POST', body=b'{"uuid": "a", "conversation_uuid": "b", "status": "answered"}',
+                     content_type='application/json') == '200 OK'
+    assert events.get_nowait().type == CALL_EVENT
+
+    assert call_wsgi(application, 'POST', body=b'{"uuid": "a", "conversation_uuid": "b", "sig": "invalid"}',
+                     content_type='application/json') == '403 Forbidden'
+
+    application = wsgi_app(signing_client(), queue=events, unsigned_types=())
+    assert call_wsgi(application, 'POST', body=b'{"uuid": "a", "conversation_uuid": "b", "status": "answered"}',
+                     content_type='application/json') == '403 Forbidden'
+
+
+def test_wsgi_app_rejects_unsigned_unknown_events():
+    events = queue.Queue()
+    application = wsgi_app(signing_client(), queue=events)
+
+    assert call_wsgi(application, query='msisdn=447700900000&to=1&messageId=abc&keyword=HI') == '403 Forbidden'
+    assert call_wsgi(application, query='messageId=abc&status=delivered') == '403 Forbidden'
+    assert events.empty()
+
+    query = signed('msisdn=447700900000&to=1&messageId=abc&keyword=HI')
+    assert call_wsgi(application, query=query) == '200 OK'
+    assert events.get_nowait().type == UNKNOWN
+
+
+def test_wsgi_app_parses_form_and_json_bodies():
+    events = []
+    application = wsgi_app(callback=events.append)
+
+    assert call_wsgi(application, 'POST', body=b'messageId=abc&status=delivered&err-code=0') == '200 OK'
+    assert call_wsgi(application, 'POST', body=b'{"uuid": "abc", "conversation_uuid": "def"}',
+                     content_type='application/json') == '200 OK'
+    assert call_wsgi(application, 'POST', body=b'[1, 2]', content_type='application/json') == '400 Bad Request'
+
+    assert [event.type for event in events] == [DELIVERY_RECEIPT, CALL_EVENT]
+
+
+def test_wsgi_app_sheds_load_when_queue_is_full():
+    application = wsgi_app(queue=queue.Queue(maxsize=1))
+
+    assert call_wsgi(application, query=INBOUND_QUERY) == '200 OK'
+    assert call_wsgi(application, query=INBOUND_QUERY) == '503 Service Unavailable'
+
+
+def test_wsgi_app_requires_a_destination():
+    with pytest.raises(ValueError):
+        wsgi_app()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 5), reason='ASGI requires Python 3.5+')
+def test_asgi_app():
+    import asyncio
+    from nexmo.asgi import asgi_app
+
+    events = queue.Queue()
+    application = asgi_app(signing_client(), queue=events)
+
+    scope = {'type': 'http', 'method': 'POST', 'query_string': b'',
+             'headers': [(b'content-type', b'application/x-www-form-urlencoded')]}
+    body = signed(INBOUND_QUERY).encode('utf-8')
+    received = [{'type': 'http.request', 'body': body[:20], 'more_body': True},
+                {'type': 'http.request', 'body': body[20:]}]
+    sent = []
+    loop = asyncio.new_event_loop()
+
+    def resolved(value):
+        future = loop.create_future()
+        future.set_result(value)
+        return future
+
+    def receive():
+        return resolved(received.pop(0))
+
+    def send(message):
+        sent.append(message)
+        return resolved(None)
+
+    loop.run_until_complete(application(scope, receive, send))
+    loop.close()
+
+    assert sent[0]['status'] == 200
+    assert events.get_nowait().type == INBOUND_MESSAGE